@@ -1,12 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-import uvicorn
 from starlette.middleware.cors import CORSMiddleware
 
 from app.exception.exception_handler import ExceptionHandler
+from app.middleware.admission import AdmissionMiddleware
 from app.router import routers
+from app.service.jobs import get_job_runner
+from app.setting import get_config
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if get_config().SERVER_PRELOAD:
+        from app.service.workflow import preload_storm
+
+        await asyncio.to_thread(preload_storm)
+    # Background jobs are opt-in: without STORM_JOBS_PATH nothing is opened or polled
+    job_runner = get_job_runner()
+    if job_runner is not None:
+        # Start workers up front so jobs left unfinished by a previous process are picked up
+        job_runner.start()
+    yield
+    if job_runner is not None:
+        # The server has stopped taking requests; let running STORM jobs finish before cancelling them
+        await job_runner.drain(get_config().STORM_JOB_DRAIN_SECONDS)
+        await job_runner.stop()
+    # Imported late so cold starts that never call an upstream skip httpx
+    from app.service.clients import aclose_http_clients
+
+    await aclose_http_clients()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 ExceptionHandler.initiate_exception_handlers(app)
+# Added before CORS so CORS wraps it: preflights are not counted and 429s carry CORS headers
+if get_config().ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Update this to match your Next.js app's URL
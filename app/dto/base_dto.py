@@ -1,10 +1,38 @@
+import json
 from abc import ABC
+from functools import lru_cache
+from typing import Any, Dict
 
+from fastapi.responses import ORJSONResponse
 from humps import camelize
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+
+@lru_cache(maxsize=None)
+def to_camel(name: str) -> str:
+    return camelize(name)
+
+
+@lru_cache(maxsize=None)
+def field_aliases(dto: type) -> Dict[str, str]:
+    return {name: field.alias or name for name, field in dto.model_fields.items()}
+
+
+class DtoResponse(ORJSONResponse):
+
+    def render(self, content: Any) -> bytes:
+        try:
+            return super().render(content)
+        except TypeError:
+            # orjson only serializes integers that fit in 64 bits
+            return json.dumps(content, separators=(",", ":")).encode("utf-8")
 
 
 class BaseDto(BaseModel, ABC):
-    class Config:
-        alias_generator = camelize
-        populate_by_name = True
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+    @classmethod
+    def response(cls, status_code: int = 200, **fields: Any) -> DtoResponse:
+        """Renders fields straight to JSON under their aliases, without building or validating the DTO."""
+        aliases = field_aliases(cls)
+        return DtoResponse({aliases[name]: value for name, value in fields.items()}, status_code=status_code)
@@ -0,0 +1,26 @@
+from typing import List, Literal
+
+from pydantic import model_validator
+
+from app.dto.base_dto import BaseDto
+
+Operation = Literal["add", "subtract", "multiply", "divide"]
+
+
+class BatchCalculationRequestDto(BaseDto):
+    operations: List[Operation]
+    first_numbers: List[int]
+    second_numbers: List[int]
+
+    @model_validator(mode="after")
+    def same_length(self):
+        if not len(self.operations) == len(self.first_numbers) == len(self.second_numbers):
+            raise ValueError("operations, firstNumbers and secondNumbers must have the same length")
+        return self
+
+
+# one line of an NDJSON batch
+class BatchCalculationRowDto(BaseDto):
+    operation: Operation
+    first_number: int
+    second_number: int
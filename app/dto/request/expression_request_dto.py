@@ -0,0 +1,11 @@
+from typing import Dict, List
+
+from pydantic import Field
+
+from app.dto.base_dto import BaseDto
+
+
+class ExpressionRequestDto(BaseDto):
+    expression: str = Field(min_length=1)
+    # one list of values per variable; row i binds every variable to its i-th value
+    variables: Dict[str, List[float]] = {}
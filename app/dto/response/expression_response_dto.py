@@ -0,0 +1,8 @@
+from typing import List, Optional
+
+from app.dto.base_dto import BaseDto
+
+
+class ExpressionResponseDto(BaseDto):
+    answers: List[Optional[float]]
+    errors: List[Optional[str]]  # per row; null where the answer is valid
@@ -1,6 +1,7 @@
 import logging
 from datetime import datetime
 from http import HTTPStatus
+from typing import Dict, Optional
 
 from fastapi.responses import Response
 
@@ -15,10 +16,13 @@ class ErrorResponseFactory:
     __logger = logging.getLogger(__name__)
 
     @staticmethod
-    def get_error_response(status_code: HTTPStatus, client_message: str) -> Response:
-        ErrorResponseFactory.__logger.error("An error occurred", exc_info=True)
+    def get_error_response(status_code: HTTPStatus, client_message: str, headers: Optional[Dict[str, str]] = None,
+                           log_exception: bool = True) -> Response:
+        if log_exception:
+            ErrorResponseFactory.__logger.error("An error occurred", exc_info=True)
         error_response = ErrorResponse(
             timestamp=str(get_datetime_now()),
             error=status_code.phrase,
             message=client_message)
-        return Response(error_response.model_dump_json(), media_type="application/json", status_code=status_code.value)
+        return Response(error_response.model_dump_json(), media_type="application/json", status_code=status_code.value,
+                        headers=headers)
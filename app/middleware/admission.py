@@ -0,0 +1,268 @@
+# app/middleware/admission.py
+import asyncio
+import hashlib
+import logging
+import math
+import re
+from collections import OrderedDict, deque
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.exception.error_response_factory import ErrorResponseFactory
+from app.service.rate_limit import TokenBucket
+from app.setting import get_config
+
+OUTCOMES = ("admitted", "queued", "rate_limited", "queue_full", "queue_timeout")
+
+
+class FairLimiter:
+    """At most ``max_in_flight`` holders at once; waiters get free slots round-robin by client.
+
+    Each client waits in its own FIFO queue and a freed slot goes to the next client in
+    rotation, so a client with many queued requests gets one slot per round like everyone
+    else instead of all the slots it asked for.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int, max_queued_per_client: int):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_queued_per_client = max_queued_per_client
+        self.in_flight = 0
+        self.queued = 0
+        # Clients with waiters, in the order their turn comes up
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    async def acquire(self, client: str, timeout: float) -> Optional[str]:
+        """None once a slot is held, else why the request was turned away."""
+        if self.in_flight < self.max_in_flight and not self._queues:
+            self.in_flight += 1
+            return None
+        queue = self._queues.get(client)
+        if self.queued >= self.max_queued or (queue is not None and len(queue) >= self.max_queued_per_client):
+            return "queue_full"
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(client, deque()).append(future)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+            return None
+        except asyncio.TimeoutError:
+            self._discard(client, future)
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the client went away
+                self.release()
+            else:
+                self._discard(client, future)
+            raise
+
+    def release(self):
+        # Pass the slot straight to the next waiter in rotation, or free it
+        while self._queues:
+            client, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _discard(self, client: str, future: asyncio.Future):
+        queue = self._queues.get(client)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self.queued -= 1
+            if not queue:
+                del self._queues[client]
+
+
+class RouteClass:
+    """Admission limits shared by every path under ``prefix``.
+
+    ``methods`` and ``pattern`` (a regular expression the whole path must match) narrow
+    the class to some of those requests. Each client identity gets a token bucket of
+    ``rate`` requests per second (``burst`` at most) and the class as a whole serves at
+    most ``max_in_flight`` requests at once; a rate or in-flight limit of 0 turns that
+    check off. All of this state lives in the process, so each worker enforces the
+    limits on its own.
+    """
+
+    def __init__(self, name: str, prefix: str, rate: float, burst: float, max_in_flight: int,
+                 max_queued: int, max_queued_per_client: int, queue_timeout: float, max_clients: int = 10_000,
+                 methods: Optional[Sequence[str]] = None, pattern: Optional[str] = None):
+        self.name = name
+        self.prefix = prefix
+        self.methods = frozenset(methods) if methods is not None else None
+        self.pattern = re.compile(pattern) if pattern is not None else None
+        self.rate = rate
+        self.burst = burst
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        self.limiter = FairLimiter(max_in_flight, max_queued, max_queued_per_client) if max_in_flight > 0 else None
+        self.outcomes: Dict[str, int] = dict.fromkeys(OUTCOMES, 0)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    @property
+    def specific(self) -> bool:
+        return self.methods is not None or self.pattern is not None
+
+    def matches(self, method: str, path: str) -> bool:
+        if path != self.prefix and not path.startswith(self.prefix + "/"):
+            return False
+        if self.methods is not None and method not in self.methods:
+            return False
+        return self.pattern is None or self.pattern.fullmatch(path) is not None
+
+    async def admit(self, clients: Sequence[str]) -> Optional[Tuple[str, float]]:
+        """None if the request may go ahead (then :meth:`release` it), else a message and retry delay.
+
+        The request is charged to the bucket of every identity in ``clients`` and only goes
+        ahead if each has a token; it waits for a slot in the queue of the first one.
+        """
+        if self.rate > 0:
+            buckets = [self._bucket(client) for client in clients]
+            wait = max(bucket.wait_time() for bucket in buckets)
+            if wait > 0:
+                self.outcomes["rate_limited"] += 1
+                return f"Too many requests, limit is {self.rate:g} per second", wait
+            for bucket in buckets:
+                bucket.try_acquire()
+        if self.limiter is not None:
+            queued = self.limiter.in_flight >= self.limiter.max_in_flight or bool(self.limiter.queued)
+            refused = await self.limiter.acquire(clients[0], self.queue_timeout)
+            if refused is not None:
+                self.outcomes[refused] += 1
+                return "The server is busy, try again shortly", max(self.queue_timeout, 1.0)
+            if queued:
+                self.outcomes["queued"] += 1
+        self.outcomes["admitted"] += 1
+        return None
+
+    def release(self):
+        if self.limiter is not None:
+            self.limiter.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.limiter.in_flight if self.limiter else None,
+            "queued": self.limiter.queued if self.limiter else 0,
+            "clients": len(self._buckets),
+            **self.outcomes,
+        }
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, capacity=self.burst)
+            # Forgetting an idle client only gives it a full bucket again
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+
+class AdmissionController:
+    """Maps requests to route classes and identifies clients by address and, with a known API key, by key.
+
+    Only keys in ``api_keys`` identify a client: anyone can make up a key, so an unknown
+    one is ignored rather than given a fresh bucket of its own.
+    """
+
+    def __init__(self, route_classes: List[RouteClass], api_key_header: str = "x-api-key",
+                 api_keys: Iterable[str] = ()):
+        # Classes narrowed by method or pattern first, then longest prefix, so the most specific class wins
+        self.route_classes = sorted(route_classes, key=lambda route_class: (route_class.specific,
+                                                                            len(route_class.prefix)), reverse=True)
+        self.api_key_header = api_key_header.lower().encode("latin-1")
+        # Keys are kept and reported hashed so they never show up in stats or logs
+        self.api_keys = {self.hash_key(key.encode()) for key in api_keys}
+
+    @staticmethod
+    def hash_key(key: bytes) -> str:
+        return hashlib.sha256(key).hexdigest()
+
+    def route_class(self, method: str, path: str) -> Optional[RouteClass]:
+        for route_class in self.route_classes:
+            if route_class.matches(method, path):
+                return route_class
+        return None
+
+    def client_ids(self, scope: Dict[str, Any]) -> List[str]:
+        """The request's identities, most specific first: its API key if known, then its address."""
+        client = scope.get("client")
+        identities = [f"ip:{client[0]}" if client else "ip:unknown"]
+        for name, value in scope.get("headers", ()):
+            if name == self.api_key_header and value:
+                key = self.hash_key(value)
+                if key in self.api_keys:
+                    identities.insert(0, "key:" + key[:16])
+                break
+        return identities
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {route_class.name: route_class.stats() for route_class in self.route_classes}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that turns requests away with a 429 when their route class is over its limits."""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or get_admission_controller()
+        self._logger = logging.getLogger(__name__)
+
+    async def __call__(self, scope, receive, send):
+        route_class = self.controller.route_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        clients = self.controller.client_ids(scope)
+        rejection = await route_class.admit(clients)
+        if rejection is not None:
+            message, retry_after = rejection
+            self._logger.debug("Rejected %s %s from %s: %s", scope["method"], scope["path"], clients[0], message)
+            response = ErrorResponseFactory.get_error_response(
+                HTTPStatus.TOO_MANY_REQUESTS, message, headers={"Retry-After": str(math.ceil(retry_after))},
+                log_exception=False)
+            await response(scope, receive, send)
+            return
+        try:
+            # The slot is held until the response, SSE streams included, has been sent
+            await self.app(scope, receive, send)
+        finally:
+            route_class.release()
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    settings = get_config()
+    llm = RouteClass(
+        "llm", "/llm",
+        rate=settings.ADMISSION_LLM_REQUESTS_PER_SECOND,
+        burst=settings.ADMISSION_LLM_BURST,
+        max_in_flight=settings.ADMISSION_LLM_MAX_IN_FLIGHT,
+        max_queued=settings.ADMISSION_LLM_MAX_QUEUED,
+        max_queued_per_client=settings.ADMISSION_LLM_MAX_QUEUED_PER_CLIENT,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        max_clients=settings.ADMISSION_MAX_CLIENTS,
+    )
+    # Job polls and stats reads are cheap: they get their own buckets and never wait behind pipelines
+    llm_reads = RouteClass(
+        "llm_reads", "/llm",
+        rate=settings.ADMISSION_LLM_READS_PER_SECOND,
+        burst=settings.ADMISSION_LLM_READS_BURST,
+        max_in_flight=0, max_queued=0, max_queued_per_client=0,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        max_clients=settings.ADMISSION_MAX_CLIENTS,
+        methods=("GET",), pattern=r"/llm/(storm/jobs/[^/]+|[^/]+/stats)",
+    )
+    api_keys = [key.strip() for key in settings.ADMISSION_API_KEYS.split(",") if key.strip()]
+    return AdmissionController([llm, llm_reads], api_key_header=settings.ADMISSION_API_KEY_HEADER,
+                               api_keys=api_keys)
@@ -1,3 +1,3 @@
-from app.router import calculator_router, health_check_router, llm_router
+from app.router import calculator_router, health_check_router, llm_router, metrics_router
 
-routers = [calculator_router, health_check_router,llm_router]
\ No newline at end of file
+routers = [calculator_router, health_check_router,llm_router, metrics_router]
\ No newline at end of file
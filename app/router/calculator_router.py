@@ -1,16 +1,26 @@
-from typing import Annotated
+import json
+from typing import Annotated, List
 
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.params import Path, Query, Form
+from fastapi.responses import Response
+from pydantic import ValidationError
 
+from app.dto.request.batch_calculation_request_dto import BatchCalculationRequestDto, BatchCalculationRowDto
 from app.dto.request.calculation_request_dto import CalculationRequestDto
+from app.dto.request.expression_request_dto import ExpressionRequestDto
+from app.dto.response.batch_calculation_response_dto import BatchCalculationResponseDto
 from app.dto.response.calculation_response_dto import CalculationResponseDto
+from app.dto.response.expression_response_dto import ExpressionResponseDto
 from app.service.calculator_service import CalculatorService
 from app.service.impl.calculator_service_impl import CalculatorServiceImpl
 
 __prefix = "/calculator"
 router = APIRouter(prefix=__prefix)
 __calculator_service: CalculatorService = CalculatorServiceImpl()
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 
 @router.get("/")
@@ -19,32 +29,90 @@ async def calculator_message() -> dict:
 
 
 # this api uses path parameters as input
-@router.get(path="/add/{firstNumber}/{secondNumber}")
+@router.get(path="/add/{firstNumber}/{secondNumber}", response_model=CalculationResponseDto)
 async def add_numbers(first_number: int = Path(..., alias='firstNumber'),
-                      second_number: int = Path(..., alias='secondNumber')) -> CalculationResponseDto:
+                      second_number: int = Path(..., alias='secondNumber')) -> Response:
     result: int = __calculator_service.add_numbers(first_number, second_number)
-    return CalculationResponseDto(answer=result)
+    return CalculationResponseDto.response(answer=result)
 
 
 # this api uses a JSON body as input
-@router.post(path="/divide")
-async def divide_numbers(calculation_request: CalculationRequestDto) -> CalculationResponseDto:
+@router.post(path="/divide", response_model=CalculationResponseDto)
+async def divide_numbers(calculation_request: CalculationRequestDto) -> Response:
     result: int = __calculator_service.divide_numbers(calculation_request.first_number,
                                                       calculation_request.second_number)
-    return CalculationResponseDto(answer=result)
+    return CalculationResponseDto.response(answer=result)
 
 
 # this url uses query parameters as input
-@router.get(path="/subtract")
+@router.get(path="/subtract", response_model=CalculationResponseDto)
 async def subtract_numbers(first_number: int = Query(..., alias='firstNumber'),
-                           second_number: int = Query(..., alias='secondNumber')) -> CalculationResponseDto:
+                           second_number: int = Query(..., alias='secondNumber')) -> Response:
     result: int = __calculator_service.subtract_numbers(first_number, second_number)
-    return CalculationResponseDto(answer=result)
+    return CalculationResponseDto.response(answer=result)
 
 
 # this url uses form data as input
-@router.post(path="/multiply")
+@router.post(path="/multiply", response_model=CalculationResponseDto)
 async def multiply_numbers(first_number: Annotated[int, Form()],
-                           second_number: Annotated[int, Form()]) -> CalculationResponseDto:
+                           second_number: Annotated[int, Form()]) -> Response:
     result: int = __calculator_service.multiply_numbers(first_number, second_number)
-    return CalculationResponseDto(answer=result)
+    return CalculationResponseDto.response(answer=result)
+
+
+def __ndjson_rows(body: bytes) -> List[BatchCalculationRowDto]:
+    # Each line is parsed on its own, so it must hold exactly one object and errors name its line number
+    rows, errors = [], []
+    for line_number, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            rows.append(BatchCalculationRowDto.model_validate_json(line))
+        except ValidationError as error:
+            errors.extend({**detail, "loc": ("body", line_number, *detail["loc"])} for detail in error.errors())
+    if errors:
+        raise RequestValidationError(errors)
+    return rows
+
+
+def __ndjson_row(answer, error) -> bytes:
+    try:
+        return orjson.dumps({"answer": answer, "error": error})
+    except TypeError:
+        # orjson only serializes integers that fit in 64 bits
+        return json.dumps({"answer": answer, "error": error}, separators=(",", ":")).encode("utf-8")
+
+
+# this api takes a JSON body of parallel arrays, or one NDJSON object per line, and answers in the same format
+@router.post(path="/batch", response_model=BatchCalculationResponseDto, openapi_extra={
+    "requestBody": {"required": True, "content": {
+        "application/json": {"schema": BatchCalculationRequestDto.model_json_schema(by_alias=True)},
+        NDJSON_MEDIA_TYPE: {"schema": BatchCalculationRowDto.model_json_schema(by_alias=True)},
+    }},
+})
+async def calculate_batch(request: Request):
+    body = await request.body()
+    ndjson = request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE)
+    if ndjson:
+        rows = __ndjson_rows(body)
+        batch = BatchCalculationRequestDto.model_construct(
+            operations=[row.operation for row in rows],
+            first_numbers=[row.first_number for row in rows],
+            second_numbers=[row.second_number for row in rows])
+    else:
+        try:
+            batch = BatchCalculationRequestDto.model_validate_json(body)
+        except ValidationError as error:
+            raise RequestValidationError(error.errors())
+    result = __calculator_service.calculate_batch(batch.operations, batch.first_numbers, batch.second_numbers)
+    if ndjson:
+        lines = (__ndjson_row(answer, error) for answer, error in zip(*result))
+        return Response(b"\n".join(lines) + b"\n" if result.answers else b"", media_type=NDJSON_MEDIA_TYPE)
+    return BatchCalculationResponseDto.response(answers=result.answers, errors=result.errors)
+
+
+# this api evaluates one formula, e.g. "(a+b)*c/d", over columns of variable values
+@router.post(path="/expression", response_model=ExpressionResponseDto)
+async def evaluate_expression(expression_request: ExpressionRequestDto) -> Response:
+    result = __calculator_service.evaluate_expression(expression_request.expression, expression_request.variables)
+    return ExpressionResponseDto.response(answers=result.answers, errors=result.errors)
@@ -1,49 +1,119 @@
 # app.py
+import json
+import logging
+from http import HTTPStatus
+
 from fastapi import FastAPI, APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from typing import Optional
 
-from langchain_core.messages import AIMessage
-
-# Import your modules from app.service
-from app.service.chains import (
-    generate_outline_direct,
-    expand_chain,
-    gen_perspectives_chain,
-    generate_question,
-    gen_answer,
-    interview_graph,
-    run_interview_graph,
-    refine_outline_chain,
-    section_writer,
-    writer,
-)
-from app.service.models import (
-    Outline,
-    Perspectives,
-    Editor,
-    InterviewState,
-    AnswerWithCitations,
-    Subsection,
-    Section,
-    WikiSection,
-)
-from app.service.utils import format_docs, swap_roles
-from app.service.workflow import run_storm
+from app.exception.application_exception import ApplicationException
+
+# LangChain, LangGraph and the model clients are imported by the handlers that need
+# them, so cold starts serving /health or /calculator never load them
+from app.service.artifact_store import get_artifact_store
+from app.service.jobs import get_job_runner, require_job_runner
+from app.service.single_flight import SingleFlight
 
 # Define your APIRouter with the prefix
 __prefix = "/llm"
 router = APIRouter(prefix=__prefix)
+logger = logging.getLogger(__name__)
 
-# In-memory storage (Replace with a database in production)
-stored_outlines = {}
-stored_perspectives = {}
-stored_interviews = {}
-stored_refined_outlines = {}
-stored_sections = {}
+# Concurrent requests for the same topic share one in-flight outline generation
+outline_flight = SingleFlight()
 
 @router.post("/generate_outline")
 async def generate_outline(topic: str):
-    initial_outline = await generate_outline_direct.ainvoke({"topic": topic})
-    stored_outlines[topic] = initial_outline
+    from app.service.chains import get_generate_outline_chain
+    from app.service.metrics import get_metrics_handler
+    from app.service.utils import normalize_topic
+
+    key = normalize_topic(topic)
+    artifact_store = get_artifact_store()
+    stored_outline = await artifact_store.get("outline", key)
+    if stored_outline is not None:
+        return stored_outline
+    initial_outline = await outline_flight.do(
+        key, lambda: get_generate_outline_chain().ainvoke({"topic": topic}, {"callbacks": [get_metrics_handler()]})
+    )
+    await artifact_store.put("outline", key, initial_outline)
     return initial_outline.dict()
 
+@router.get("/artifacts/stats")
+async def artifact_store_stats():
+    return get_artifact_store().stats()
+
+@router.get("/cache/stats")
+async def llm_cache_stats():
+    from app.service.llm_cache import get_llm_cache
+
+    llm_cache = get_llm_cache()
+    if llm_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_cache.stats()}
+
+@router.get("/clients/stats")
+async def http_client_stats():
+    from app.service.clients import pool_stats
+
+    return pool_stats()
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def storm_events(topic: str, config: Optional[dict] = None, resume: bool = False):
+    from app.service.workflow import new_storm_config, stream_storm
+
+    config = config or new_storm_config()
+    yield format_sse("run", {"thread_id": config["configurable"]["thread_id"], "topic": topic})
+    try:
+        async for event, data in stream_storm(topic, config, resume=resume):
+            yield format_sse(event, data)
+    except Exception as exception:
+        logger.exception("STORM stream failed for topic %s", topic)
+        yield format_sse("error", {"message": str(exception)})
+        return
+    yield format_sse("done", {"topic": topic})
+
+def storm_event_stream(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/storm/stream")
+async def stream_storm_article(topic: str):
+    return storm_event_stream(storm_events(topic))
+
+@router.get("/storm/runs/{thread_id}/resume")
+async def resume_storm_article(thread_id: str):
+    from app.service.workflow import resumable_storm_run
+
+    config = {"configurable": {"thread_id": thread_id}}
+    # A job's thread is resumed by its worker; streaming it here too would run it twice
+    runner = get_job_runner()
+    if runner is not None:
+        await runner.reject_active(thread_id)
+    state = await resumable_storm_run(config)
+    if state is None:
+        raise ApplicationException(f"No interrupted STORM run {thread_id}", HTTPStatus.NOT_FOUND)
+    return storm_event_stream(storm_events(state["topic"], config, resume=True))
+
+@router.post("/storm/jobs", status_code=202)
+async def submit_storm_job(topic: str):
+    return await require_job_runner().submit(topic)
+
+@router.get("/storm/jobs/stats")
+async def storm_job_stats():
+    return await require_job_runner().stats()
+
+@router.get("/storm/jobs/{job_id}")
+async def get_storm_job(job_id: str):
+    return await require_job_runner().status(job_id)
+
+@router.post("/storm/jobs/{job_id}/resume", status_code=202)
+async def resume_storm_job(job_id: str):
+    return await require_job_runner().resume(job_id)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+
+__prefix = "/metrics"
+router = APIRouter(prefix=__prefix)
+
+@router.get("", response_class=PlainTextResponse)
+async def metrics():
+    # Imported on first scrape: the metrics module pulls in LangChain's callbacks
+    from app.service.metrics import CONTENT_TYPE, get_metrics
+
+    return PlainTextResponse(get_metrics().render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,77 @@
+# app/service/artifact_store.py
+import asyncio
+import json
+import math
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from app.service.cache import LRUTTLCache, SQLiteCache
+from app.setting import get_config
+
+
+class ArtifactStore:
+    """Intermediate STORM artifacts (outlines, perspectives, ...) keyed by kind and key.
+
+    Values are stored as JSON. A per-worker LRU tier, bounded by serialized size, sits in
+    front of an optional SQLite tier shared by every worker on the host, so an artifact
+    produced by one worker is served by the others instead of being regenerated.
+    """
+
+    def __init__(self, memory: LRUTTLCache, shared: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.shared = shared
+
+    @staticmethod
+    def make_key(kind: str, key: str) -> str:
+        return f"{kind}:{key}"
+
+    async def get(self, kind: str, key: str) -> Optional[Any]:
+        store_key = self.make_key(kind, key)
+        serialized = self.memory.get(store_key)
+        if serialized is None and self.shared is not None:
+            entry = await asyncio.to_thread(self.shared.get_with_ttl, store_key)
+            if entry is not None:
+                raw, ttl_seconds = entry
+                serialized = raw.decode()
+                # The promoted copy expires with the shared row, not a full TTL later, and never if the row doesn't
+                self.memory.set(store_key, serialized, len(serialized),
+                                ttl_seconds=ttl_seconds if ttl_seconds is not None else math.inf)
+        return json.loads(serialized) if serialized is not None else None
+
+    async def put(self, kind: str, key: str, value: Any):
+        store_key = self.make_key(kind, key)
+        serialized = json.dumps(jsonable_encoder(value))
+        self.memory.set(store_key, serialized, len(serialized))
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.set, store_key, serialized.encode())
+
+    async def delete(self, kind: str, key: str):
+        store_key = self.make_key(kind, key)
+        self.memory.delete(store_key)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.delete, store_key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+
+@lru_cache()
+def get_artifact_store() -> ArtifactStore:
+    settings = get_config()
+    memory = LRUTTLCache(
+        max_entries=settings.ARTIFACT_MAX_ENTRIES,
+        max_bytes=settings.ARTIFACT_MAX_BYTES,
+        ttl_seconds=settings.ARTIFACT_TTL_SECONDS,
+    )
+    shared = None
+    if settings.ARTIFACT_STORE_PATH:
+        shared = SQLiteCache(settings.ARTIFACT_STORE_PATH, table="artifacts",
+                             ttl_seconds=settings.ARTIFACT_TTL_SECONDS,
+                             max_entries=settings.ARTIFACT_STORE_MAX_ENTRIES,
+                             purge_interval_seconds=settings.SQLITE_CACHE_PURGE_INTERVAL_SECONDS)
+    return ArtifactStore(memory, shared)
@@ -1,4 +1,10 @@
 from abc import ABC
+from typing import List, Mapping, NamedTuple, Optional, Sequence
+
+
+class BatchCalculationResult(NamedTuple):
+    answers: List[Optional[float]]
+    errors: List[Optional[str]]
 
 
 class CalculatorService(ABC):
@@ -14,3 +20,10 @@ class CalculatorService(ABC):
 
     def divide_numbers(self, first_number: int, second_number: int) -> int:
         raise NotImplementedError()
+
+    def calculate_batch(self, operations: Sequence[str], first_numbers: Sequence[int],
+                        second_numbers: Sequence[int]) -> BatchCalculationResult:
+        raise NotImplementedError()
+
+    def evaluate_expression(self, expression: str, variables: Mapping[str, Sequence[float]]) -> BatchCalculationResult:
+        raise NotImplementedError()
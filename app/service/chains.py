@@ -1,13 +1,11 @@
 # chains.py
-import os
-
-from langchain_community.tools import TavilySearchResults
 from langchain_core.runnables import RunnableLambda, chain as as_runnable, RunnableConfig
 from langchain_core.messages import AIMessage, ToolMessage
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.tools import tool
+from langgraph.graph import END, StateGraph, START
+from langgraph.pregel import RetryPolicy
+from functools import lru_cache
 from typing import Optional
-import json
 
 from app.service.prompts import (
     direct_gen_outline_prompt,
@@ -29,45 +27,59 @@ from app.service.models import (
     AnswerWithCitations,
     WikiSection,
 )
-from app.service.utils import format_docs, tag_with_name, swap_roles, wikipedia_retriever
+from app.service.utils import format_docs, tag_with_name, swap_roles
 
 # app/service/chains.py
-from langchain_openai import ChatOpenAI
-
+from app.service.clients import get_chat_model
+from app.service.context_packer import pack_search_results
+from app.service.interview_scheduler import InterviewScheduler
+from app.service.metrics import get_metrics
+from app.service.model_router import tiered_model
+from app.service.resilience import retry_node_on
+from app.service.search import get_search_engine
+from app.service.wiki_retriever import get_wikipedia_retriever
 from app.setting import get_config
 
 settings=get_config()
-fast_llm = ChatOpenAI(model="gpt-4o-mini", api_key=settings.OPENAI_API_KEY)
-long_context_llm = ChatOpenAI(model="gpt-4o", api_key=settings.OPENAI_API_KEY)
-
-
-generate_outline_direct = direct_gen_outline_prompt | fast_llm.with_structured_output(
-    Outline
-)
-
-expand_chain = gen_related_topics_prompt | fast_llm.with_structured_output(
-    RelatedSubjects
-)
+metrics = get_metrics()
+FAST_MODEL = "gpt-4o-mini"
+
+# Chains are built on first use: each one creates (or reuses) its model clients then,
+# so importing this module, or serving one route, doesn't construct all of them.
+@lru_cache()
+def get_generate_outline_chain():
+    return metrics.instrument_chain(
+        direct_gen_outline_prompt | get_chat_model(FAST_MODEL).with_structured_output(Outline),
+        "generate_outline_direct",
+    )
 
-gen_perspectives_chain = gen_perspectives_prompt | ChatOpenAI(
-    model="gpt-3.5-turbo", api_key=settings.OPENAI_API_KEY
-).with_structured_output(Perspectives)
-os.environ["TAVILY_API_KEY"] = settings.TAVILY_API_KEY
-search_engine = TavilySearchResults(max_results=4,api_key=settings.TAVILY_API_KEY)
+@lru_cache()
+def get_expand_chain():
+    return metrics.instrument_chain(
+        gen_related_topics_prompt | get_chat_model(FAST_MODEL).with_structured_output(RelatedSubjects),
+        "expand_chain",
+    )
 
-@tool
-async def search_engine(query: str):
-    """Search engine to the internet."""
-    results = search_engine.invoke(query)
-    return [{"content": r["content"], "url": r["url"]} for r in results]
+@lru_cache()
+def get_perspectives_chain():
+    return metrics.instrument_chain(
+        gen_perspectives_prompt | get_chat_model("gpt-3.5-turbo").with_structured_output(Perspectives),
+        "gen_perspectives_chain",
+    )
 
-gen_queries_chain = gen_queries_prompt | ChatOpenAI(
-    model="gpt-3.5-turbo", api_key=settings.OPENAI_API_KEY
-).with_structured_output(Queries, include_raw=True)
+@lru_cache()
+def get_queries_chain():
+    return metrics.instrument_chain(
+        gen_queries_prompt | get_chat_model("gpt-3.5-turbo").with_structured_output(Queries, include_raw=True),
+        "gen_queries_chain",
+    )
 
-gen_answer_chain = gen_answer_prompt | fast_llm.with_structured_output(
-    AnswerWithCitations, include_raw=True
-).with_config(run_name="GenerateAnswer")
+@lru_cache()
+def get_answer_chain():
+    return metrics.instrument_chain(
+        gen_answer_prompt | get_chat_model(FAST_MODEL).with_structured_output(AnswerWithCitations, include_raw=True),
+        "GenerateAnswer",
+    )
 
 @as_runnable
 async def generate_question(state: InterviewState):
@@ -75,7 +87,7 @@ async def generate_question(state: InterviewState):
     gn_chain = (
         RunnableLambda(swap_roles).bind(name=editor.name)
         | gen_qn_prompt.partial(persona=editor.persona)
-        | fast_llm
+        | get_chat_model(FAST_MODEL)
         | RunnableLambda(tag_with_name).bind(name=editor.name)
     )
     result = await gn_chain.ainvoke(state)
@@ -87,21 +99,18 @@ async def gen_answer(
     state: InterviewState,
     config: Optional[RunnableConfig] = None,
     name: str = "Subject_Matter_Expert",
-    max_str_len: int = 15000,
+    max_tokens: int = settings.ANSWER_CONTEXT_TOKENS,
 ):
     swapped_state = swap_roles(state, name)  # Convert all other AI messages
-    queries = await gen_queries_chain.ainvoke(swapped_state)
-    query_results = await search_engine.abatch(
-        queries["parsed"].queries, config, return_exceptions=True
-    )
+    queries = await get_queries_chain().ainvoke(swapped_state)
+    query_results = await get_search_engine().search_many(queries["parsed"].queries)
     successful_results = [
         res for res in query_results if not isinstance(res, Exception)
     ]
-    all_query_results = {
-        res["url"]: res["content"] for results in successful_results for res in results
-    }
-    # We could be more precise about handling max token length if we wanted to here
-    dumped = json.dumps(all_query_results)[:max_str_len]
+    flat_results = [res for results in successful_results for res in results]
+    all_query_results = {res["url"]: res["content"] for res in flat_results}
+    # Rank, dedupe and fit the results into the answer model's token budget
+    dumped = pack_search_results(flat_results, max_tokens, FAST_MODEL)
     ai_message: AIMessage = queries["raw"]
     tool_call = queries["raw"].tool_calls[0]
     tool_id = tool_call["id"]
@@ -109,52 +118,65 @@ async def gen_answer(
     swapped_state["messages"].extend([ai_message, tool_message])
     # Only update the shared state with the final answer to avoid
     # polluting the dialogue history with intermediate messages
-    generated = await gen_answer_chain.ainvoke(swapped_state)
+    generated = await get_answer_chain().ainvoke(swapped_state)
     cited_urls = set(generated["parsed"].cited_urls)
+    scheduler = InterviewScheduler.from_config(config)
+    if scheduler is not None:
+        scheduler.record_answer(config, cited_urls)
     # Save the retrieved information to a the shared state for future reference
     cited_references = {k: v for k, v in all_query_results.items() if k in cited_urls}
     formatted_message = AIMessage(name=name, content=generated["parsed"].as_str)
     return {"messages": [formatted_message], "references": cited_references}
 
 # Implement the graph logic
-from langgraph.graph import END, StateGraph, START
-from langgraph.pregel import RetryPolicy
-
-def route_messages(state: InterviewState, name: str = "Subject_Matter_Expert"):
+def route_messages(
+    state: InterviewState,
+    config: Optional[RunnableConfig] = None,
+    name: str = "Subject_Matter_Expert",
+):
     messages = state["messages"]
     num_responses = len(
         [m for m in messages if isinstance(m, AIMessage) and m.name == name]
     )
-    max_num_turns = 5  # Adjust as needed
+    max_num_turns = settings.INTERVIEW_MAX_TURNS
     if num_responses >= max_num_turns:
         return END
     last_question = messages[-2]
     if last_question.content.strip().endswith("Thank you so much for your help!"):
         return END
+    # Within a STORM run the scheduler can end the interview early (budget, no new citations)
+    scheduler = InterviewScheduler.from_config(config)
+    if scheduler is not None and not scheduler.should_continue(config):
+        return END
     return "ask_question"
 
-builder = StateGraph(InterviewState)
-
-builder.add_node("ask_question", generate_question, retry=RetryPolicy(max_attempts=5))
-builder.add_node("answer_question", gen_answer, retry=RetryPolicy(max_attempts=5))
-builder.add_conditional_edges("answer_question", route_messages)
-builder.add_edge("ask_question", "answer_question")
-
-builder.add_edge(START, "ask_question")
-interview_graph = builder.compile(checkpointer=False).with_config(
-    run_name="Conduct Interviews"
-)
+@lru_cache()
+def get_interview_graph():
+    """Return the process-wide compiled interview graph."""
+    builder = StateGraph(InterviewState)
+
+    builder.add_node("ask_question", generate_question, retry=RetryPolicy(max_attempts=5, retry_on=retry_node_on))
+    builder.add_node("answer_question", gen_answer, retry=RetryPolicy(max_attempts=5, retry_on=retry_node_on))
+    builder.add_conditional_edges("answer_question", route_messages)
+    builder.add_edge("ask_question", "answer_question")
+
+    builder.add_edge(START, "ask_question")
+    interview_graph = builder.compile(checkpointer=False)
+    metrics.instrument_graph("interview", interview_graph)
+    return interview_graph.with_config(
+        run_name="Conduct Interviews"
+    )
 
 # Function to run the interview graph
 async def run_interview_graph(initial_state: InterviewState):
     final_state = initial_state
-    async for step in interview_graph.astream(initial_state):
+    async for step in get_interview_graph().astream(initial_state):
         final_state = next(iter(step.values()))
     return final_state
 @as_runnable
 async def survey_subjects(topic: str):
-    related_subjects = await expand_chain.ainvoke({"topic": topic})
-    retrieved_docs = await wikipedia_retriever.abatch(
+    related_subjects = await get_expand_chain().ainvoke({"topic": topic})
+    retrieved_docs = await get_wikipedia_retriever().abatch(
         related_subjects.topics, return_exceptions=True
     )
     all_docs = []
@@ -162,19 +184,34 @@ async def survey_subjects(topic: str):
         if isinstance(docs, Exception):
             continue
         all_docs.extend(docs)
-    formatted = format_docs(all_docs)
-    perspectives = await gen_perspectives_chain.ainvoke({"examples": formatted, "topic": topic})
+    formatted = format_docs(
+        all_docs, max_tokens=settings.SURVEY_CONTEXT_TOKENS, model="gpt-3.5-turbo"
+    )
+    perspectives = await get_perspectives_chain().ainvoke({"examples": formatted, "topic": topic})
     return perspectives
-# Define the refine_outline_chain
-refine_outline_chain = refine_outline_prompt | long_context_llm.with_structured_output(
-    Outline
-)
+survey_subjects = metrics.instrument_chain(survey_subjects, "survey_subjects")
+
+# Define the refine_outline_chain; it streams so sections can be dispatched as they arrive
+@lru_cache()
+def get_refine_outline_chain():
+    return metrics.instrument_chain(
+        refine_outline_prompt
+        | tiered_model("refine_outline_chain", FAST_MODEL, "gpt-4o", structured_output=Outline, streaming=True),
+        "refine_outline_chain",
+    )
 
 # Define section_writer chain
-section_writer = (
-    section_writer_prompt
-    | long_context_llm.with_structured_output(WikiSection)
-)
+@lru_cache()
+def get_section_writer():
+    return metrics.instrument_chain(
+        section_writer_prompt
+        | tiered_model("section_writer", FAST_MODEL, "gpt-4o", structured_output=WikiSection),
+        "section_writer",
+    )
 
 # Define writer chain
-writer = writer_prompt | long_context_llm | StrOutputParser()
+@lru_cache()
+def get_writer():
+    return metrics.instrument_chain(
+        writer_prompt | tiered_model("writer", FAST_MODEL, "gpt-4o") | StrOutputParser(), "writer"
+    )
@@ -0,0 +1,288 @@
+# app/service/clients.py
+import asyncio
+import importlib.util
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.service.rate_limit import TokenBucket, get_rate_limiter
+from app.service.resilience import (
+    THROTTLING_STATUS_CODES,
+    BackoffPolicy,
+    CircuitBreaker,
+    CircuitOpenError,
+    backoff_policy,
+    get_circuit_breaker,
+)
+from app.setting import get_config
+
+# Base URLs of the upstreams we keep a connection pool for. OpenAI requests carry
+# absolute URLs built by the openai SDK, so its pool has no base URL.
+UPSTREAMS: Dict[str, Optional[str]] = {
+    "openai": None,
+    "tavily": "https://api.tavily.com",
+    "wikipedia": "https://en.wikipedia.org",
+}
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Async transport for one upstream: rate limiting, retries, a circuit breaker and counters.
+
+    Each call is retried on its own (timeouts, network errors, 429 and 5xx responses)
+    with jittered exponential backoff that honors ``Retry-After``, so a failure in one
+    item of a batch never re-runs its siblings. ``transport`` defaults to a pooled
+    ``httpx.AsyncHTTPTransport`` built from the remaining keyword arguments.
+    """
+
+    def __init__(self, upstream: str, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 rate_limiter: Optional[TokenBucket] = None, backoff: Optional[BackoffPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None, **kwargs: Any):
+        self.transport = transport or httpx.AsyncHTTPTransport(**kwargs)
+        self.upstream = upstream
+        self.rate_limiter = rate_limiter
+        self.backoff = backoff or BackoffPolicy(max_attempts=1)
+        self.breaker = breaker
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.rejected = 0
+        self.in_flight = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.breaker is not None and not self.breaker.allow():
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.upstream} circuit breaker is open", request=request)
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            self.requests += 1
+            self.in_flight += 1
+            try:
+                response = await self.transport.handle_async_request(request)
+            except Exception as exception:
+                self.errors += 1
+                self._record(failed=True)
+                delay = self.backoff.delay(attempt) if self.backoff.should_retry_exception(exception) else None
+                if delay is None:
+                    raise
+            except BaseException:
+                if self.breaker is not None:
+                    self.breaker.record_abandoned()
+                raise
+            else:
+                if not self.backoff.should_retry_response(response):
+                    self._record(failed=False)
+                    return response
+                self.errors += 1
+                self._record(failed=response.status_code not in THROTTLING_STATUS_CODES)
+                delay = self.backoff.delay(attempt, response)
+                if delay is None:
+                    return response
+                await response.aclose()
+            finally:
+                self.in_flight -= 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def _record(self, failed: bool):
+        if self.breaker is None:
+            return
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "rate_limit": self.rate_limiter.stats() if self.rate_limiter is not None else None,
+            "circuit": self.breaker.stats() if self.breaker is not None else None,
+        }
+        pool = getattr(self.transport, "_pool", None)
+        if pool is not None:
+            connections = pool.connections
+            stats.update({
+                "connections": len(connections),
+                "idle_connections": sum(1 for connection in connections if connection.is_idle()),
+                "max_connections": pool._max_connections,
+                "max_keepalive_connections": pool._max_keepalive_connections,
+            })
+        return stats
+
+
+class RetryingTransport(httpx.BaseTransport):
+    """Blocking counterpart of :class:`InstrumentedTransport`'s retries for the sync clients."""
+
+    def __init__(self, upstream: str, backoff: BackoffPolicy, breaker: Optional[CircuitBreaker] = None,
+                 **kwargs: Any):
+        self.transport = httpx.HTTPTransport(**kwargs)
+        self.upstream = upstream
+        self.backoff = backoff
+        self.breaker = breaker
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.breaker is not None and not self.breaker.allow():
+                raise CircuitOpenError(f"{self.upstream} circuit breaker is open", request=request)
+            try:
+                response = self.transport.handle_request(request)
+            except Exception as exception:
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                delay = self.backoff.delay(attempt) if self.backoff.should_retry_exception(exception) else None
+                if delay is None:
+                    raise
+            else:
+                if not self.backoff.should_retry_response(response):
+                    if self.breaker is not None:
+                        self.breaker.record_success()
+                    return response
+                if self.breaker is not None and response.status_code not in THROTTLING_STATUS_CODES:
+                    self.breaker.record_failure()
+                delay = self.backoff.delay(attempt, response)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+
+    def close(self):
+        self.transport.close()
+
+
+def http2_available() -> bool:
+    return get_config().HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+
+def _limits() -> httpx.Limits:
+    settings = get_config()
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_http_client(upstream: str) -> httpx.AsyncClient:
+    """Return the process-wide async client (and connection pool) for an upstream."""
+    client = _http_clients.get(upstream)
+    if client is None:
+        inner = None
+        if get_config().BACKENDS == "fake" and upstream != "openai":
+            from app.service.fake_backends import fake_transport
+
+            inner = fake_transport(upstream)
+        transport = InstrumentedTransport(
+            upstream,
+            transport=inner,
+            rate_limiter=get_rate_limiter(upstream),
+            backoff=backoff_policy(),
+            breaker=get_circuit_breaker(upstream),
+            limits=_limits(),
+            http2=http2_available(),
+        )
+        client = httpx.AsyncClient(
+            base_url=UPSTREAMS[upstream] or "",
+            transport=transport,
+            timeout=get_config().HTTP_TIMEOUT_SECONDS,
+        )
+        _http_clients[upstream] = client
+    return client
+
+
+def set_http_client(upstream: str, client: httpx.AsyncClient):
+    """Replace an upstream's client, e.g. with one on an ``httpx.MockTransport`` for offline runs."""
+    _http_clients[upstream] = client
+
+
+@lru_cache(maxsize=None)
+def get_sync_http_client(upstream: str) -> httpx.Client:
+    base_url = UPSTREAMS[upstream]
+    transport = RetryingTransport(
+        upstream,
+        backoff=backoff_policy(),
+        breaker=get_circuit_breaker(upstream),
+        limits=_limits(),
+        http2=http2_available(),
+    )
+    return httpx.Client(
+        base_url=base_url or "",
+        transport=transport,
+        timeout=get_config().HTTP_TIMEOUT_SECONDS,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model: str, streaming: bool = False) -> "ChatOpenAI":
+    """Return the shared chat model for a model name, wired to the pooled OpenAI clients.
+
+    ``streaming`` models stream every completion (reporting tokens to callbacks) while
+    still going through the response cache. The model SDKs are imported on first use,
+    keeping them out of cold starts that never call a model.
+    """
+    from app.service.llm_cache import get_llm_cache
+
+    if get_config().BACKENDS == "fake":
+        from app.service.fake_backends import fake_chat_model
+
+        return fake_chat_model(model, streaming=streaming, cache=get_llm_cache())
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,
+        streaming=streaming,
+        stream_usage=streaming,
+        api_key=get_config().OPENAI_API_KEY,
+        # Retries happen per call in the pooled clients' transports
+        max_retries=0,
+        cache=get_llm_cache(),
+        http_client=get_sync_http_client("openai"),
+        http_async_client=get_http_client("openai"),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_embeddings(model: str = "text-embedding-3-small") -> "OpenAIEmbeddings":
+    if get_config().BACKENDS == "fake":
+        from app.service.fake_backends import fake_embeddings
+
+        return fake_embeddings()
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(
+        model=model,
+        api_key=get_config().OPENAI_API_KEY,
+        max_retries=0,
+        http_client=get_sync_http_client("openai"),
+        http_async_client=get_http_client("openai"),
+    )
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Utilization of every upstream pool opened so far in this process."""
+    return {
+        upstream: {"http2": http2_available(), **client._transport.stats()}
+        for upstream, client in _http_clients.items()
+        if isinstance(client._transport, InstrumentedTransport)
+    }
+
+
+async def aclose_http_clients():
+    for client in _http_clients.values():
+        await client.aclose()
+    _http_clients.clear()
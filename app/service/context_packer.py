@@ -0,0 +1,125 @@
+# app/service/context_packer.py
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Set
+
+import tiktoken
+
+from app.setting import get_config
+
+DEFAULT_ENCODING = "o200k_base"
+NEAR_DUPLICATE_THRESHOLD = 0.8
+MIN_TRUNCATED_TOKENS = 32  # don't bother adding a snippet cut shorter than this
+
+_WORD = re.compile(r"\w+")
+_PIECE = re.compile(r"\s*\w+|\s*[^\w\s]|\s+")
+
+
+class ApproximateEncoding:
+    """Offline stand-in for a tiktoken encoding: one "token" per word or punctuation mark.
+
+    Used with the fake backends, where tiktoken's encoding files may not be downloadable.
+    """
+
+    def encode(self, text: str, disallowed_special=()) -> List[str]:
+        return _PIECE.findall(text)
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    if get_config().BACKENDS == "fake":
+        return ApproximateEncoding()
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+
+def count_tokens(text: str, model: str) -> int:
+    return len(get_encoding(model).encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Cut ``text`` to at most ``max_tokens`` tokens, backing off to a word boundary."""
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    truncated = encoding.decode(tokens[: max(max_tokens - 1, 0)])
+    boundary = truncated.rfind(" ")
+    if boundary > len(truncated) // 2:
+        truncated = truncated[:boundary]
+    return truncated.rstrip() + "…"
+
+
+def _shingles(text: str, size: int = 4) -> Set[int]:
+    words = _WORD.findall(text.casefold())
+    if len(words) <= size:
+        return {hash(" ".join(words))}
+    return {hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+class NearDuplicateFilter:
+    """Drops texts whose word shingles mostly overlap a text already accepted."""
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._seen: List[Set[int]] = []
+
+    def accept(self, text: str) -> bool:
+        shingles = _shingles(text)
+        for seen in self._seen:
+            overlap = len(shingles & seen) / (len(shingles | seen) or 1)
+            if overlap >= self.threshold:
+                return False
+        self._seen.append(shingles)
+        return True
+
+
+def _dumps(value) -> str:
+    # Non-ASCII text kept as-is costs far fewer tokens than \u escapes
+    return json.dumps(value, ensure_ascii=False)
+
+
+def pack_search_results(results: Iterable[Dict], max_tokens: int, model: str) -> str:
+    """Serialize search results as a ``{url: content}`` JSON object that fits ``max_tokens``.
+
+    Results are ranked by search score, de-duplicated by URL and by near-identical
+    content, and added whole while they fit; the first one that doesn't is cut at a
+    token boundary. The output is always complete, valid JSON.
+    """
+    ranked = sorted(results, key=lambda result: result.get("score") or 0.0, reverse=True)
+    duplicates = NearDuplicateFilter()
+    packed: Dict[str, str] = {}
+    used = count_tokens("{}", model)
+    for result in ranked:
+        url, content = result["url"], result["content"]
+        if url in packed or not duplicates.accept(content):
+            continue
+        entry = f"{_dumps(url)}: {_dumps(content)}, "
+        entry_tokens = count_tokens(entry, model)
+        if used + entry_tokens <= max_tokens:
+            packed[url] = content
+            used += entry_tokens
+            continue
+        overhead = count_tokens(f'{_dumps(url)}: "", ', model)
+        remaining = max_tokens - used - overhead
+        if remaining >= MIN_TRUNCATED_TOKENS:
+            packed[url] = truncate_to_tokens(content, remaining, model)
+        break
+    dumped = _dumps(packed)
+    # Token counts are not exactly additive across entries and escapes; trim until it fits
+    while packed and count_tokens(dumped, model) > max_tokens:
+        url = next(reversed(packed))
+        excess = count_tokens(dumped, model) - max_tokens
+        shorter = max(count_tokens(packed[url], model) - excess - 1, 0)
+        if shorter < MIN_TRUNCATED_TOKENS:
+            del packed[url]
+        else:
+            packed[url] = truncate_to_tokens(packed[url], shorter, model)
+        dumped = _dumps(packed)
+    return dumped
@@ -0,0 +1,171 @@
+# app/service/expression.py
+import ast
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Any, Callable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.exception.application_exception import ApplicationException
+from app.service.cache import LRUTTLCache
+from app.setting import get_config
+
+BINARY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power,
+}
+DIVISIONS = (ast.Div, ast.FloorDiv, ast.Mod)
+UNARY_OPERATORS = {ast.UAdd: np.positive, ast.USub: np.negative}
+# name: (function, fewest arguments, most arguments)
+FUNCTIONS = {
+    "abs": (np.abs, 1, 1),
+    "sqrt": (np.sqrt, 1, 1),
+    "min": (lambda *values: _reduce(np.minimum, values), 1, None),
+    "max": (lambda *values: _reduce(np.maximum, values), 1, None),
+}
+
+
+def _reduce(function: Callable, values: Sequence[Any]) -> Any:
+    result = values[0]
+    for value in values[1:]:
+        result = function(result, value)
+    return result
+
+
+class Instruction:
+    __slots__ = ("function", "arguments", "target", "divisor")
+
+    def __init__(self, function: Callable, arguments: Tuple[int, ...], target: int, divisor: bool = False):
+        self.function = function
+        self.arguments = arguments
+        self.target = target
+        self.divisor = divisor  # the last argument divides, so rows where it is 0 are errors
+
+
+class ExpressionPlan:
+    """An arithmetic expression compiled into NumPy instructions over numbered slots.
+
+    The first slots hold the variables, in ``variables`` order; the others start as the
+    constants in ``slots`` and are filled in by the instructions. Sub-expressions over
+    constants only are folded at compile time.
+    """
+
+    def __init__(self, expression: str, variables: Tuple[str, ...], slots: Tuple[Optional[float], ...],
+                 instructions: Tuple[Instruction, ...], result: int):
+        self.expression = expression
+        self.variables = variables
+        self.slots = slots
+        self.instructions = instructions
+        self.result = result
+
+    def evaluate(self, columns: Mapping[str, np.ndarray], rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Values of the expression for every row, and the rows that divided by zero."""
+        slots: List[Any] = list(self.slots)
+        for index, name in enumerate(self.variables):
+            slots[index] = columns[name]
+        zero_division = np.zeros(rows, dtype=bool)
+        with np.errstate(all="ignore"):
+            for instruction in self.instructions:
+                arguments = [slots[index] for index in instruction.arguments]
+                if instruction.divisor:
+                    zero_division |= np.equal(arguments[-1], 0)
+                slots[instruction.target] = instruction.function(*arguments)
+        values = np.broadcast_to(np.asarray(slots[self.result], dtype=np.float64), (rows,))
+        return values, zero_division
+
+
+class _Compiler:
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.variables: List[str] = []
+        self.slots: List[Optional[float]] = []
+        self.constants: set = set()
+        self.instructions: List[Instruction] = []
+        self.nodes = 0
+
+    def compile(self) -> ExpressionPlan:
+        try:
+            tree = ast.parse(self.expression.strip(), mode="eval")
+            # Variables take the first slots
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Name) and node.id not in self.variables and node.id not in FUNCTIONS:
+                    self.variables.append(node.id)
+            self.slots = [None] * len(self.variables)
+            result = self.visit(tree.body)
+        except SyntaxError as exception:
+            raise ApplicationException(f"Invalid expression: {exception.msg}", HTTPStatus.BAD_REQUEST)
+        except (RecursionError, MemoryError, ValueError):
+            raise ApplicationException("Invalid expression", HTTPStatus.BAD_REQUEST)
+        return ExpressionPlan(self.expression, tuple(self.variables), tuple(self.slots), tuple(self.instructions),
+                              result)
+
+    def visit(self, node: ast.AST) -> int:
+        self.nodes += 1
+        if self.nodes > get_config().CALCULATOR_EXPRESSION_MAX_NODES:
+            raise ApplicationException("Expression is too long", HTTPStatus.BAD_REQUEST)
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            try:
+                return self.constant(float(node.value))
+            except OverflowError:
+                # Like 1e400, an integer beyond float range is infinite and its rows are reported as not finite
+                return self.constant(float("inf"))
+        if isinstance(node, ast.Name):
+            if node.id in FUNCTIONS:
+                raise ApplicationException(f"{node.id} is a function", HTTPStatus.BAD_REQUEST)
+            return self.variables.index(node.id)
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            arguments = (self.visit(node.left), self.visit(node.right))
+            return self.emit(BINARY_OPERATORS[type(node.op)], arguments, isinstance(node.op, DIVISIONS))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            return self.emit(UNARY_OPERATORS[type(node.op)], (self.visit(node.operand),))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS \
+                and not node.keywords:
+            function, fewest, most = FUNCTIONS[node.func.id]
+            if len(node.args) < fewest or (most is not None and len(node.args) > most):
+                raise ApplicationException(f"Wrong number of arguments to {node.func.id}", HTTPStatus.BAD_REQUEST)
+            return self.emit(function, tuple(self.visit(argument) for argument in node.args))
+        raise ApplicationException(f"Unsupported syntax: {ast.get_source_segment(self.expression, node) or node}",
+                                   HTTPStatus.BAD_REQUEST)
+
+    def constant(self, value: float) -> int:
+        self.slots.append(value)
+        self.constants.add(len(self.slots) - 1)
+        return len(self.slots) - 1
+
+    def emit(self, function: Callable, arguments: Tuple[int, ...], divisor: bool = False) -> int:
+        if all(slot in self.constants for slot in arguments):
+            values = [self.slots[slot] for slot in arguments]
+            # A constant zero divisor is left for evaluation, so it is reported per row
+            if not (divisor and values[-1] == 0):
+                with np.errstate(all="ignore"):
+                    return self.constant(float(function(*values)))
+        self.slots.append(None)
+        self.instructions.append(Instruction(function, arguments, len(self.slots) - 1, divisor))
+        return len(self.slots) - 1
+
+
+def compile_expression(expression: str) -> ExpressionPlan:
+    if len(expression) > get_config().CALCULATOR_EXPRESSION_MAX_LENGTH:
+        raise ApplicationException("Expression is too long", HTTPStatus.BAD_REQUEST)
+    return _Compiler(expression).compile()
+
+
+@lru_cache()
+def get_expression_cache() -> LRUTTLCache:
+    return LRUTTLCache(max_entries=get_config().CALCULATOR_EXPRESSION_CACHE_ENTRIES)
+
+
+def get_expression_plan(expression: str) -> ExpressionPlan:
+    """The compiled plan for an expression, compiling it only on its first use."""
+    cache = get_expression_cache()
+    plan: Optional[ExpressionPlan] = cache.get(expression)
+    if plan is None:
+        plan = compile_expression(expression)
+        cache.set(expression, plan)
+    return plan
@@ -0,0 +1,293 @@
+# app/service/fake_backends.py
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.setting import get_config
+
+VOCABULARY = (
+    "research", "evidence", "practice", "support", "approach", "community", "history", "framework",
+    "outcome", "strategy", "resilience", "wellbeing", "routine", "clinical", "guidance", "study",
+    "habit", "therapy", "awareness", "progress", "balance", "network", "review", "method",
+)
+_URL = re.compile(r"https?://[^\s\"'<>)\]]+")
+_WORD = re.compile(r"[A-Za-z]{4,}")
+CHUNK_CHARACTERS = 24  # streamed completions arrive in pieces of about this size
+
+
+class LatencyModel:
+    """Samples call latencies, in seconds, around ``mean_ms``.
+
+    ``distribution`` is ``constant``, ``uniform`` (0 to twice the mean), ``exponential``
+    or ``lognormal`` (with shape ``sigma``, a realistic long tail).
+    """
+
+    def __init__(self, mean_ms: float, distribution: str = "lognormal", sigma: float = 0.5,
+                 rng: Optional[random.Random] = None):
+        self.mean = mean_ms / 1000
+        self.distribution = distribution
+        self.sigma = sigma
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        if self.mean <= 0:
+            return 0.0
+        if self.distribution == "constant":
+            return self.mean
+        if self.distribution == "uniform":
+            return self.rng.uniform(0, 2 * self.mean)
+        if self.distribution == "exponential":
+            return self.rng.expovariate(1 / self.mean)
+        # Pick mu so the distribution's mean is the configured mean
+        return self.rng.lognormvariate(math.log(self.mean) - self.sigma ** 2 / 2, self.sigma)
+
+    async def asleep(self):
+        await asyncio.sleep(self.sample())
+
+
+def _seeded(*parts: str) -> random.Random:
+    digest = hashlib.sha256("\x00".join(parts).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big") ^ get_config().FAKE_SEED)
+
+
+def _sentence(rng: random.Random, words: Sequence[str], length: int) -> str:
+    text = " ".join(rng.choice(words) for _ in range(length))
+    return text[:1].upper() + text[1:] + "."
+
+
+def fake_value(schema: Dict[str, Any], rng: random.Random, words: Sequence[str], urls: Sequence[str],
+               name: str = "") -> Any:
+    """A plausible value for a (dereferenced) JSON schema, shaped by the field ``name``."""
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return fake_value(options[0], rng, words, urls, name) if options else None
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type", "string")
+    if kind == "object":
+        return {
+            key: fake_value(value, rng, words, urls, key)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        item_name = name.rstrip("s")
+        low = schema.get("minItems", 2)
+        count = rng.randint(low, max(low, min(4, schema.get("maxItems", 4))))
+        return [fake_value(schema.get("items", {}), rng, words, urls, item_name) for _ in range(count)]
+    if kind == "integer":
+        return rng.randint(1, 10)
+    if kind == "number":
+        return round(rng.uniform(0, 1), 3)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    value = _fake_string(rng, words, urls, name)
+    if "pattern" in schema:
+        # Patterns in our models are identifier-like (e.g. message names)
+        value = re.sub(r"[^A-Za-z0-9_-]+", "_", value).strip("_")
+    return value[:schema.get("maxLength", len(value))]
+
+
+def _fake_string(rng: random.Random, words: Sequence[str], urls: Sequence[str], name: str) -> str:
+    if "url" in name:
+        return rng.choice(urls) if urls else f"https://example.com/{rng.choice(words)}"
+    if any(part in name for part in ("title", "name", "topic", "query", "queries", "affiliation", "role")):
+        return _sentence(rng, words, rng.randint(2, 5)).rstrip(".")
+    if any(part in name for part in ("content", "answer")):
+        return " ".join(_sentence(rng, words, rng.randint(8, 16)) for _ in range(rng.randint(4, 8)))
+    return _sentence(rng, words, rng.randint(8, 20))
+
+
+def _approximate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel(BaseChatModel):
+    """Offline chat model with deterministic answers and simulated latency.
+
+    Replies (plain text, or tool calls for bound tools and structured output) are derived
+    from a hash of the prompt, reuse its words and cite the URLs it contains, and report
+    approximate token usage like the OpenAI models do.
+    """
+
+    model_name: str = "gpt-4o-mini"
+    streaming: bool = False
+    latency: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def bind_tools(self, tools: Sequence[Any], tool_choice: Optional[Any] = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _should_stream(self, *, async_api: bool, run_manager: Any = None, **kwargs: Any) -> bool:
+        return self.streaming or super()._should_stream(async_api=async_api, run_manager=run_manager, **kwargs)
+
+    def _reply(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> AIMessage:
+        prompt = "\n".join(str(message.content) for message in messages)
+        rng = _seeded(self.model_name, prompt, json.dumps(tools or [], sort_keys=True))
+        words = [word.lower() for word in _WORD.findall(prompt)[-400:]] or list(VOCABULARY)
+        words = list(dict.fromkeys(words)) + list(VOCABULARY)
+        urls = list(dict.fromkeys(_URL.findall(prompt)))
+        usage = {"input_tokens": _approximate_tokens(prompt)}
+        if tools:
+            function = tools[0]["function"]
+            arguments = fake_value(function["parameters"], rng, words, urls)
+            tool_call = {"name": function["name"], "args": arguments, "id": f"call_{rng.getrandbits(64):016x}"}
+            usage["output_tokens"] = _approximate_tokens(json.dumps(arguments))
+            message = AIMessage(content="", tool_calls=[tool_call])
+        else:
+            content = "\n\n".join(
+                " ".join(_sentence(rng, words, rng.randint(8, 16)) for _ in range(rng.randint(3, 6)))
+                for _ in range(rng.randint(2, 4))
+            )
+            usage["output_tokens"] = _approximate_tokens(content)
+            message = AIMessage(content=content)
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        message.usage_metadata = usage
+        message.response_metadata = {"model_name": self.model_name, "finish_reason": "stop"}
+        return message
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency.sample())
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages, kwargs.get("tools")))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await self.latency.asleep()
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages, kwargs.get("tools")))])
+
+    def _chunks(self, message: AIMessage) -> Iterator[AIMessageChunk]:
+        if message.tool_calls:
+            tool_call = message.tool_calls[0]
+            arguments = json.dumps(tool_call["args"])
+            for start in range(0, len(arguments), CHUNK_CHARACTERS):
+                first = start == 0
+                yield AIMessageChunk(content="", tool_call_chunks=[{
+                    "name": tool_call["name"] if first else None,
+                    "args": arguments[start:start + CHUNK_CHARACTERS],
+                    "id": tool_call["id"] if first else None,
+                    "index": 0,
+                }])
+        else:
+            for start in range(0, len(message.content), CHUNK_CHARACTERS):
+                yield AIMessageChunk(content=message.content[start:start + CHUNK_CHARACTERS])
+        yield AIMessageChunk(content="", usage_metadata=message.usage_metadata,
+                             response_metadata=message.response_metadata)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any
+                       ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._reply(messages, kwargs.get("tools"))
+        chunks = list(self._chunks(message))
+        # Spend about a third of the latency before the first token, the rest streaming
+        total = self.latency.sample()
+        await asyncio.sleep(total / 3)
+        for chunk in chunks:
+            await asyncio.sleep(total * 2 / 3 / len(chunks))
+            yield ChatGenerationChunk(message=chunk)
+
+
+class FakeEmbeddings(DeterministicFakeEmbedding):
+    """Deterministic embeddings (a vector per distinct text) with simulated latency."""
+
+    latency: Any = None
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await self.latency.asleep()
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await self.latency.asleep()
+        return self.embed_query(text)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.casefold()).strip("-") or "page"
+
+
+def tavily_handler(latency: LatencyModel):
+    """``httpx.MockTransport`` handler answering ``POST /search`` like Tavily."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await latency.asleep()
+        body = json.loads(request.content)
+        query = body.get("query", "")
+        rng = _seeded("tavily", query)
+        words = [word.lower() for word in _WORD.findall(query)] + list(VOCABULARY)
+        results = [
+            {
+                "url": f"https://search.example.com/{_slug(query)}/{index}",
+                "title": _sentence(rng, words, 4).rstrip("."),
+                "content": " ".join(_sentence(rng, words, rng.randint(10, 20)) for _ in range(3)),
+                "score": round(1 - index * 0.1, 2),
+            }
+            for index in range(body.get("max_results", 4))
+        ]
+        return httpx.Response(200, json={"query": query, "results": results})
+
+    return handler
+
+
+def wikipedia_handler(latency: LatencyModel):
+    """``httpx.MockTransport`` handler answering the MediaWiki search queries of ``WikipediaPageRetriever``."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await latency.asleep()
+        query = request.url.params.get("gsrsearch", "")
+        rng = _seeded("wikipedia", query)
+        words = [word.lower() for word in _WORD.findall(query)] + list(VOCABULARY)
+        title = query.strip().title() or "Main Page"
+        return httpx.Response(200, json={"query": {"pages": [{
+            "title": title,
+            "extract": " ".join(_sentence(rng, words, rng.randint(10, 20)) for _ in range(5)),
+            "categories": [{"title": f"Category:{_sentence(rng, words, 2).rstrip('.')}"} for _ in range(3)],
+            "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+        }]}})
+
+    return handler
+
+
+@lru_cache(maxsize=None)
+def get_latency_model(backend: str) -> LatencyModel:
+    settings = get_config()
+    mean_ms = {
+        "openai": settings.FAKE_LLM_LATENCY_MS,
+        "embeddings": settings.FAKE_EMBEDDING_LATENCY_MS,
+        "tavily": settings.FAKE_SEARCH_LATENCY_MS,
+        "wikipedia": settings.FAKE_WIKIPEDIA_LATENCY_MS,
+    }[backend]
+    return LatencyModel(mean_ms, settings.FAKE_LATENCY_DISTRIBUTION, settings.FAKE_LATENCY_SIGMA,
+                        random.Random(f"{settings.FAKE_SEED}:{backend}"))
+
+
+def fake_chat_model(model: str, streaming: bool = False, **kwargs: Any) -> FakeChatModel:
+    return FakeChatModel(model_name=model, streaming=streaming, latency=get_latency_model("openai"), **kwargs)
+
+
+def fake_embeddings(size: int = 256) -> FakeEmbeddings:
+    return FakeEmbeddings(size=size, latency=get_latency_model("embeddings"))
+
+
+def fake_transport(upstream: str) -> httpx.MockTransport:
+    handlers = {"tavily": tavily_handler, "wikipedia": wikipedia_handler}
+    return httpx.MockTransport(handlers[upstream](get_latency_model(upstream)))
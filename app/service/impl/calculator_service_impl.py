@@ -1,7 +1,18 @@
 import logging
+from http import HTTPStatus
+from typing import Mapping, Sequence
 
 from app.exception.application_exception import ApplicationException
-from app.service.calculator_service import CalculatorService
+from app.service.calculator_service import BatchCalculationResult, CalculatorService
+from app.setting import get_config
+
+# Exact Python arithmetic, for batch rows that would lose precision or overflow as int64
+EXACT_OPERATIONS = {
+    "add": lambda first, second: first + second,
+    "subtract": lambda first, second: first - second,
+    "multiply": lambda first, second: first * second,
+    "divide": lambda first, second: int(first / second),
+}
 
 
 class CalculatorServiceImpl(CalculatorService):
@@ -31,8 +42,108 @@ class CalculatorServiceImpl(CalculatorService):
         answer: int = int(first_number / second_number)
         return answer
 
+    def calculate_batch(self, operations: Sequence[str], first_numbers: Sequence[int],
+                        second_numbers: Sequence[int]) -> BatchCalculationResult:
+        # Imported on first use so the single-operation routes keep a light cold start
+        import numpy as np
+
+        rows = len(operations)
+        if rows > get_config().CALCULATOR_BATCH_MAX_ROWS:
+            raise ApplicationException(f"A batch can have at most {get_config().CALCULATOR_BATCH_MAX_ROWS} rows",
+                                       HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        if not rows == len(first_numbers) == len(second_numbers):
+            raise ApplicationException("operations, firstNumbers and secondNumbers must have the same length",
+                                       HTTPStatus.BAD_REQUEST)
+        self.__logger.debug("Doing %d batched operations", rows)
+        try:
+            first = np.asarray(first_numbers, dtype=np.int64)
+            second = np.asarray(second_numbers, dtype=np.int64)
+        except OverflowError:
+            # Operands beyond 64 bits: every row takes the exact path
+            first = second = None
+        operation = np.asarray(operations, dtype=str)
+        add, subtract = operation == "add", operation == "subtract"
+        multiply, divide = operation == "multiply", operation == "divide"
+
+        # Same rules as the single-operation routes, in the order they are checked there
+        errors = np.full(rows, None, dtype=object)
+        errors[~(add | subtract | multiply | divide)] = "Unknown operation"
+        if first is None:
+            return self.__calculate_exact(operations, first_numbers, second_numbers, errors.tolist())
+        errors[add & ((first < 0) | (second < 0))] = "Numbers must be positive"
+        errors[divide & (second <= 0)] = "secondNumber must be greater than 0"
+        errors[divide & (second > 0) & (first < second)] = "firstNumber must be greater than secondNumber"
+        valid = np.equal(errors, None)
+
+        answers = np.zeros(rows, dtype=np.int64)
+        with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+            answers[add] = first[add] + second[add]
+            answers[subtract] = first[subtract] - second[subtract]
+            answers[multiply] = first[multiply] * second[multiply]
+            # int(a / b) as the divide route does; float64 is exact for operands up to 2**53
+            quotient = divide & valid
+            answers[quotient] = np.trunc(first[quotient] / second[quotient]).astype(np.int64)
+
+            approximate = np.zeros(rows, dtype=np.float64)
+            approximate[add] = first[add].astype(np.float64) + second[add]
+            approximate[subtract] = first[subtract].astype(np.float64) - second[subtract]
+            approximate[multiply] = first[multiply].astype(np.float64) * second[multiply]
+        exact = valid & (np.abs(approximate) >= 2.0 ** 62)
+        exact |= quotient & ((np.abs(first) > 2 ** 53) | (second > 2 ** 53))
+
+        result = answers.astype(object)
+        result[~valid] = None
+        result = result.tolist()
+        for row in np.flatnonzero(exact).tolist():
+            result[row] = EXACT_OPERATIONS[operations[row]](int(first_numbers[row]), int(second_numbers[row]))
+        return BatchCalculationResult(result, errors.tolist())
+
+    def evaluate_expression(self, expression: str, variables: Mapping[str, Sequence[float]]) -> BatchCalculationResult:
+        import numpy as np
+
+        from app.service.expression import get_expression_plan
+
+        plan = get_expression_plan(expression)
+        missing = [name for name in plan.variables if name not in variables]
+        if missing:
+            raise ApplicationException(f"No values for {', '.join(missing)}", HTTPStatus.BAD_REQUEST)
+        lengths = {len(variables[name]) for name in plan.variables} or {1}
+        if len(lengths) > 1:
+            raise ApplicationException("Every variable must have the same number of values", HTTPStatus.BAD_REQUEST)
+        rows = lengths.pop()
+        if rows > get_config().CALCULATOR_BATCH_MAX_ROWS:
+            raise ApplicationException(f"A batch can have at most {get_config().CALCULATOR_BATCH_MAX_ROWS} rows",
+                                       HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        self.__logger.debug("Evaluating %s over %d rows", expression, rows)
+        columns = {name: np.asarray(variables[name], dtype=np.float64) for name in plan.variables}
+        values, zero_division = plan.evaluate(columns, rows)
+
+        errors = np.full(rows, None, dtype=object)
+        errors[~np.isfinite(values)] = "Result is not a finite number"
+        errors[zero_division] = "Division by zero"
+        answers = values.astype(object)
+        answers[~np.equal(errors, None)] = None
+        return BatchCalculationResult(answers.tolist(), errors.tolist())
+
+    def __calculate_exact(self, operations: Sequence[str], first_numbers: Sequence[int],
+                          second_numbers: Sequence[int], errors: list) -> BatchCalculationResult:
+        answers = [None] * len(operations)
+        for row, (operation, first_number, second_number) in enumerate(zip(operations, first_numbers,
+                                                                           second_numbers)):
+            if errors[row] is not None:
+                continue
+            if operation == "add" and (first_number < 0 or second_number < 0):
+                errors[row] = "Numbers must be positive"
+            elif operation == "divide" and second_number <= 0:
+                errors[row] = "secondNumber must be greater than 0"
+            elif operation == "divide" and first_number < second_number:
+                errors[row] = "firstNumber must be greater than secondNumber"
+            else:
+                answers[row] = EXACT_OPERATIONS[operation](first_number, second_number)
+        return BatchCalculationResult(answers, errors)
+
     def __create_log(self, first_number: int, second_number: int, operation: str):
-        self.__logger.debug(
-            "Doing operation: " + operation + ". " + "First number is: " + str(first_number) + ", " + "Second number "
-                                                                                                      "is: " + str(
-                second_number))
+        # Formatted by logging only if a handler takes the record; skipped outright when debug is off
+        if self.__logger.isEnabledFor(logging.DEBUG):
+            self.__logger.debug("Doing operation: %s. First number is: %s, Second number is: %s",
+                                operation, first_number, second_number)
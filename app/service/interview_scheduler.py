@@ -0,0 +1,131 @@
+# app/service/interview_scheduler.py
+import asyncio
+import logging
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import merge_configs
+
+from app.service.usage import UsageTracker
+from app.setting import get_config
+
+SCHEDULER_KEY = "interview_scheduler"
+INTERVIEW_ID_KEY = "interview_id"
+
+
+class RunBudget:
+    """Caps on the interview turns, tokens and estimated dollars one STORM run may spend."""
+
+    def __init__(self, max_turns: int, max_tokens: int, max_dollars: float):
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.max_dollars = max_dollars
+
+    def exhausted(self, turns: int, usage: UsageTracker) -> Optional[str]:
+        if turns >= self.max_turns:
+            return "turns"
+        if usage.total_tokens >= self.max_tokens:
+            return "tokens"
+        if usage.cost >= self.max_dollars:
+            return "dollars"
+        return None
+
+
+@lru_cache()
+def get_interview_semaphore() -> asyncio.Semaphore:
+    """Process-wide cap on interviews in flight, shared by every run."""
+    return asyncio.Semaphore(get_config().INTERVIEW_MAX_CONCURRENCY)
+
+
+class InterviewScheduler:
+    """Runs one STORM run's interviews under the global concurrency cap and a run budget.
+
+    The interview graph consults the scheduler (through its config) after every answer:
+    an interview stops once the run budget is spent, or once ``stale_turns`` of its own
+    answers in a row cite no URL the run hasn't seen yet. An interview that fails is
+    dropped from the run; the node only fails when every interview does.
+    """
+
+    def __init__(self, budget: RunBudget, stale_turns: int = 2,
+                 semaphore: Optional[asyncio.Semaphore] = None):
+        self.budget = budget
+        self.stale_turns = stale_turns
+        self.semaphore = semaphore or get_interview_semaphore()
+        self.usage = UsageTracker()
+        self.turns = 0
+        self.seen_urls: Set[str] = set()
+        self.stop_reasons: Counter = Counter()
+        self._stale: Dict[int, int] = {}
+        self._logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_settings(cls) -> "InterviewScheduler":
+        settings = get_config()
+        budget = RunBudget(
+            max_turns=settings.STORM_RUN_MAX_INTERVIEW_TURNS,
+            max_tokens=settings.STORM_RUN_MAX_INTERVIEW_TOKENS,
+            max_dollars=settings.STORM_RUN_MAX_INTERVIEW_DOLLARS,
+        )
+        return cls(budget, stale_turns=settings.INTERVIEW_STALE_TURNS)
+
+    @staticmethod
+    def from_config(config: Optional[RunnableConfig]) -> Optional["InterviewScheduler"]:
+        return ((config or {}).get("configurable") or {}).get(SCHEDULER_KEY)
+
+    async def run(self, interview_graph: Runnable, initial_states: List[Dict[str, Any]],
+                  config: Optional[RunnableConfig] = None) -> List[Dict[str, Any]]:
+        results = await asyncio.gather(
+            *(self._run_one(interview_graph, index, state, config) for index, state in enumerate(initial_states)),
+            return_exceptions=True,
+        )
+        self._logger.info("Interviews finished: %s", self.stats())
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        # A failed interview contributes no references instead of failing its siblings
+        return [state if isinstance(result, BaseException) else result
+                for state, result in zip(initial_states, results)]
+
+    async def _run_one(self, interview_graph: Runnable, index: int, state: Dict[str, Any],
+                       config: Optional[RunnableConfig]) -> Dict[str, Any]:
+        async with self.semaphore:
+            if self.budget.exhausted(self.turns, self.usage):
+                self.stop_reasons["skipped"] += 1
+                return state
+            interview_config = merge_configs(
+                config,
+                {"callbacks": [self.usage], "configurable": {SCHEDULER_KEY: self, INTERVIEW_ID_KEY: index}},
+            )
+            try:
+                return await interview_graph.ainvoke(state, interview_config)
+            except Exception:
+                self.stop_reasons["failed"] += 1
+                self._logger.exception("Interview %d failed", index)
+                raise
+
+    def record_answer(self, config: RunnableConfig, cited_urls: Iterable[str]):
+        interview_id = config["configurable"][INTERVIEW_ID_KEY]
+        new_urls = set(cited_urls) - self.seen_urls
+        self.seen_urls |= new_urls
+        self.turns += 1
+        self._stale[interview_id] = 0 if new_urls else self._stale.get(interview_id, 0) + 1
+
+    def should_continue(self, config: RunnableConfig) -> bool:
+        exhausted = self.budget.exhausted(self.turns, self.usage)
+        if exhausted:
+            self.stop_reasons[exhausted] += 1
+            return False
+        if self._stale.get(config["configurable"][INTERVIEW_ID_KEY], 0) >= self.stale_turns:
+            self.stop_reasons["no_new_citations"] += 1
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "cited_urls": len(self.seen_urls),
+            "stop_reasons": dict(self.stop_reasons),
+            **self.usage.stats(),
+        }
@@ -0,0 +1,318 @@
+# app/service/jobs.py
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from app.exception.application_exception import ApplicationException
+from app.setting import get_config
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobStore:
+    """SQLite table of STORM jobs that doubles as the work queue.
+
+    Workers claim the oldest queued job with a lease; a job whose worker died (lease
+    expired without renewal) becomes claimable again, so any process sharing the file
+    picks it up.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 60.0):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS storm_jobs ("
+            "id TEXT PRIMARY KEY, topic TEXT NOT NULL, status TEXT NOT NULL, "
+            "completed_nodes TEXT NOT NULL DEFAULT '[]', result TEXT, error TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, lease_expires_at REAL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS storm_jobs_status ON storm_jobs (status, created_at)")
+
+    def create(self, topic: str) -> str:
+        job_id = f"storm-{uuid4().hex}"
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO storm_jobs (id, topic, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, topic, QUEUED, now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM storm_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["completed_nodes"] = json.loads(job["completed_nodes"])
+        return job
+
+    def count_queued(self) -> int:
+        with self._lock:
+            (queued,) = self._conn.execute(
+                "SELECT COUNT(*) FROM storm_jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()
+        return queued
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE storm_jobs SET status = ?, attempts = attempts + 1, lease_expires_at = ?, updated_at = ? "
+                "WHERE id = (SELECT id FROM storm_jobs WHERE status = ? "
+                "OR (status = ? AND lease_expires_at < ?) ORDER BY created_at LIMIT 1) "
+                "RETURNING id, topic, attempts, completed_nodes",
+                (RUNNING, now + self.lease_seconds, now, QUEUED, RUNNING, now),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["completed_nodes"] = json.loads(job["completed_nodes"])
+        return job
+
+    def renew(self, job_id: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE storm_jobs SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (now + self.lease_seconds, now, job_id, RUNNING),
+            )
+
+    def progress(self, job_id: str, completed_nodes: List[str]):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE storm_jobs SET completed_nodes = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(completed_nodes), time.time(), job_id),
+            )
+
+    def finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE storm_jobs SET status = ?, result = ?, error = ?, lease_expires_at = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (status, result, error, time.time(), job_id),
+            )
+
+    def requeue(self, job_id: str):
+        """Hand a running job back, e.g. on shutdown; the claim is not counted as an attempt."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE storm_jobs SET status = ?, attempts = MAX(attempts - 1, 0), lease_expires_at = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (QUEUED, time.time(), job_id),
+            )
+
+    def retry(self, job_id: str) -> bool:
+        """Queue a failed job again with a fresh attempt budget; False if it had not failed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE storm_jobs SET status = ?, attempts = 0, error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, FAILED),
+            )
+        return cursor.rowcount > 0
+
+
+class StormJobRunner:
+    """Bounded pool of asyncio workers running STORM jobs from a :class:`JobStore`.
+
+    At most ``max_workers`` runs execute at once per process; once ``max_queued`` jobs are
+    waiting, new submissions are rejected instead of piling up.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 2, max_queued: int = 32,
+                 max_attempts: int = 3, poll_seconds: float = 1.0):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.running = 0
+        self.draining = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._logger = logging.getLogger(__name__)
+
+    async def submit(self, topic: str) -> Dict[str, Any]:
+        self._reject_while_draining()
+        if await asyncio.to_thread(self.store.count_queued) >= self.max_queued:
+            raise ApplicationException("Too many STORM jobs are queued, try again later",
+                                       HTTPStatus.SERVICE_UNAVAILABLE)
+        job_id = await asyncio.to_thread(self.store.create, topic)
+        self.start()
+        self._wakeup.set()
+        return await self.status(job_id)
+
+    async def status(self, job_id: str) -> Dict[str, Any]:
+        from app.service.workflow import STORM_NODE_OUTPUTS
+
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            raise ApplicationException(f"STORM job {job_id} not found", HTTPStatus.NOT_FOUND)
+        return {
+            "id": job["id"],
+            "topic": job["topic"],
+            "status": job["status"],
+            "progress": {"completed_nodes": job["completed_nodes"], "total_nodes": len(STORM_NODE_OUTPUTS)},
+            "article": job["result"],
+            "error": job["error"],
+            "attempts": job["attempts"],
+        }
+
+    async def resume(self, job_id: str) -> Dict[str, Any]:
+        """Re-run a failed job; it continues from its last checkpoint when one was kept."""
+        self._reject_while_draining()
+        if not await asyncio.to_thread(self.store.retry, job_id):
+            job = await self.status(job_id)
+            raise ApplicationException(f"STORM job {job_id} is {job['status']}, only failed jobs can be resumed",
+                                       HTTPStatus.CONFLICT)
+        self.start()
+        self._wakeup.set()
+        return await self.status(job_id)
+
+    async def reject_active(self, job_id: str):
+        """409 if ``job_id`` is a job that a worker, in any process, is running or will pick up."""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is not None and job["status"] in (QUEUED, RUNNING):
+            raise ApplicationException(f"STORM job {job_id} is {job['status']}", HTTPStatus.CONFLICT)
+
+    def start(self):
+        """Start the workers on the running event loop; a no-op once they are up or draining."""
+        if self._workers or self.draining:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_workers)]
+
+    async def drain(self, timeout: float):
+        """Stop claiming jobs and give the running ones up to ``timeout`` seconds to finish.
+
+        Jobs still running afterwards are cancelled by :meth:`stop` and handed back to the
+        queue, so another worker resumes them from their checkpoints.
+        """
+        self.draining = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._workers and timeout > 0:
+            _, pending = await asyncio.wait(self._workers, timeout=timeout)
+            if pending:
+                self._logger.warning("%d STORM jobs still running after %.0f s, requeueing them",
+                                     self.running, timeout)
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "running": self.running,
+            "draining": self.draining,
+            "queued": await asyncio.to_thread(self.store.count_queued),
+            "max_queued": self.max_queued,
+        }
+
+    def _reject_while_draining(self):
+        if self.draining:
+            raise ApplicationException("The server is shutting down, try again shortly",
+                                       HTTPStatus.SERVICE_UNAVAILABLE)
+
+    async def _work(self):
+        while not self.draining:
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                try:
+                    # Jobs submitted by other processes are only seen by polling
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.running += 1
+            try:
+                await self._run(job)
+            finally:
+                self.running -= 1
+
+    async def _run(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        if job["attempts"] > self.max_attempts:
+            # Every earlier worker died mid-run; don't let one job crash-loop the pool
+            await asyncio.to_thread(self.store.finish, job_id, FAILED,
+                                    error=f"Abandoned after {self.max_attempts} attempts")
+            return
+        # The STORM workflow (LangChain, LangGraph, model clients) loads with the first job, not at startup
+        from app.service.workflow import resumable_storm_run, stream_storm
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        article = None
+        try:
+            config = {"configurable": {"thread_id": job_id}}
+            # A job reclaimed after a crash, shutdown or failure picks up where its checkpoints end
+            resume = await resumable_storm_run(config) is not None
+            completed_nodes: List[str] = job["completed_nodes"] if resume else []
+            async for event, data in stream_storm(job["topic"], config, resume=resume):
+                if event != "node":
+                    continue
+                completed_nodes.append(data["node"])
+                await asyncio.to_thread(self.store.progress, job_id, completed_nodes)
+                article = data.get("article", article)
+            await asyncio.to_thread(self.store.finish, job_id, SUCCEEDED, result=article)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so the next worker starts it again
+            await asyncio.shield(asyncio.to_thread(self.store.requeue, job_id))
+            raise
+        except Exception as exception:
+            if isinstance(exception, ApplicationException) and exception.status == HTTPStatus.CONFLICT:
+                # Its lease lapsed while its run is still streaming in this process; that run finishes the job
+                self._logger.warning("STORM job %s is already running here, leaving it to that run", job_id)
+                return
+            self._logger.exception("STORM job %s failed", job_id)
+            await asyncio.to_thread(self.store.finish, job_id, FAILED, error=str(exception))
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            await asyncio.to_thread(self.store.renew, job_id)
+
+
+@lru_cache()
+def get_job_runner() -> Optional[StormJobRunner]:
+    """The process-wide job runner, or None when background jobs are off (no STORM_JOBS_PATH)."""
+    settings = get_config()
+    if not settings.STORM_JOBS_PATH:
+        return None
+    store = JobStore(settings.STORM_JOBS_PATH, lease_seconds=settings.STORM_JOB_LEASE_SECONDS)
+    return StormJobRunner(store, max_workers=settings.STORM_JOB_WORKERS,
+                          max_queued=settings.STORM_JOB_MAX_QUEUED,
+                          max_attempts=settings.STORM_JOB_MAX_ATTEMPTS,
+                          poll_seconds=settings.STORM_JOB_POLL_SECONDS)
+
+
+def require_job_runner() -> StormJobRunner:
+    runner = get_job_runner()
+    if runner is None:
+        raise ApplicationException("Background STORM jobs are disabled; set STORM_JOBS_PATH to enable them",
+                                   HTTPStatus.SERVICE_UNAVAILABLE)
+    return runner
@@ -0,0 +1,112 @@
+# app/service/llm_cache.py
+import asyncio
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from app.service.cache import LRUTTLCache, SQLiteCache
+from app.service.usage import CACHE_HIT_KEY
+from app.setting import get_config
+
+
+class LLMResponseCache(BaseCache):
+    """Content-addressed cache of chat model generations.
+
+    LangChain hands every lookup the rendered messages (``prompt``) and a description of
+    the model, including its name and any bound tool / structured-output schema
+    (``llm_string``); the cache key is a hash of both. Entries live in an in-memory LRU
+    tier and, when configured, an on-disk SQLite tier that survives restarts.
+    """
+
+    def __init__(self, memory: LRUTTLCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        serialized = self.memory.get(key)
+        if serialized is None and self.disk is not None:
+            raw = self.disk.get(key)
+            if raw is not None:
+                serialized = raw.decode()
+                self.memory.set(key, serialized, len(serialized))
+        return self._record(serialized)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        serialized = self.memory.get(key)
+        if serialized is None and self.disk is not None:
+            raw = await asyncio.to_thread(self.disk.get, key)
+            if raw is not None:
+                serialized = raw.decode()
+                self.memory.set(key, serialized, len(serialized))
+        return self._record(serialized)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self.make_key(prompt, llm_string)
+        serialized = dumps(list(return_val))
+        self.memory.set(key, serialized, len(serialized))
+        if self.disk is not None:
+            self.disk.set(key, serialized.encode())
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self.make_key(prompt, llm_string)
+        serialized = dumps(list(return_val))
+        self.memory.set(key, serialized, len(serialized))
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, serialized.encode())
+
+    def clear(self, **kwargs: Any) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
+
+    def _record(self, serialized: Optional[str]) -> Optional[RETURN_VAL_TYPE]:
+        # Deserialize on every hit so callers never share (and mutate) cached messages
+        if serialized is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        generations = loads(serialized)
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is not None:
+                message.response_metadata[CACHE_HIT_KEY] = True
+        return generations
+
+
+@lru_cache()
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Build the process-wide LLM response cache from settings, or None when disabled."""
+    settings = get_config()
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    memory = LRUTTLCache(
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        max_bytes=settings.LLM_CACHE_MAX_BYTES,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    )
+    disk = None
+    if settings.LLM_CACHE_SQLITE_PATH:
+        disk = SQLiteCache(settings.LLM_CACHE_SQLITE_PATH, table="llm_cache",
+                           ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                           max_entries=settings.LLM_CACHE_SQLITE_MAX_ENTRIES,
+                           purge_interval_seconds=settings.SQLITE_CACHE_PURGE_INTERVAL_SECONDS)
+    return LLMResponseCache(memory, disk)
@@ -0,0 +1,270 @@
+# app/service/metrics.py
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from langchain_core.runnables import Runnable
+
+from app.middleware.admission import OUTCOMES, get_admission_controller
+from app.service.clients import pool_stats
+from app.service.usage import UsageTracker, estimate_cost
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """A Prometheus metric family with a fixed set of label names."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value:g}"
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels: Any):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        counts, totals = self._histograms.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        totals[0] += value
+
+    def samples(self) -> Iterable[str]:
+        for key, (counts, totals) in sorted(self._histograms.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {totals[0]:g}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Metrics kept in process, plus collectors that build metrics from live stats at scrape time."""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Metric]]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        metrics = [*self.metrics]
+        for collector in self.collectors:
+            metrics.extend(collector())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+class StormMetrics:
+    """The STORM service's metrics: graph nodes, chains, models, runs and upstream calls."""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+        self.node_duration = register(Histogram(
+            "storm_node_duration_seconds", "Latency of graph node runs, retries included.", ("graph", "node")))
+        self.node_runs = register(Counter(
+            "storm_node_runs_total", "Graph node runs by outcome.", ("graph", "node", "status")))
+        self.nodes_in_flight = register(Gauge(
+            "storm_nodes_in_flight", "Graph node runs in progress.", ("graph", "node")))
+        self.chain_duration = register(Histogram(
+            "storm_chain_duration_seconds", "Latency of instrumented chain runs.", ("chain",)))
+        self.chain_runs = register(Counter(
+            "storm_chain_runs_total", "Instrumented chain runs by outcome.", ("chain", "status")))
+        self.model_calls = register(Counter(
+            "llm_calls_total", "Chat model calls, including those served by the response cache.",
+            ("model", "cached")))
+        self.model_tokens = register(Counter(
+            "llm_tokens_total", "Tokens billed by the chat model upstream.", ("model", "kind")))
+        self.model_cost = register(Counter(
+            "llm_cost_dollars_total", "Estimated chat model spend in US dollars.", ("model",)))
+        self.model_routes = register(Counter(
+            "llm_routing_decisions_total", "Model picked by the prompt-size router, per chain.", ("chain", "model")))
+        self.runs_in_flight = register(Gauge("storm_runs_in_flight", "STORM runs in progress."))
+        self.runs = register(Counter("storm_runs_total", "Finished STORM runs by outcome.", ("status",)))
+        self.registry.register_collector(upstream_metrics)
+        self.registry.register_collector(admission_metrics)
+        self.graph_nodes: Dict[str, str] = {}
+        self.chains: Set[str] = set()
+
+    def instrument_graph(self, name: str, graph: Any):
+        """Label the nodes of a compiled graph with the graph's name."""
+        for node in graph.nodes:
+            if not node.startswith("__"):
+                self.graph_nodes[node] = name
+
+    def instrument_chain(self, runnable: Runnable, name: str) -> Runnable:
+        """Name a chain's runs so the metrics callback records their latency."""
+        self.chains.add(name)
+        return runnable.with_config(run_name=name)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+def upstream_metrics() -> Iterable[Metric]:
+    labels = ("upstream",)
+    requests = Counter("upstream_requests_total", "Requests sent to upstream APIs, retries included.", labels)
+    errors = Counter("upstream_errors_total", "Failed upstream requests (errors, 429 and 5xx responses).", labels)
+    retries = Counter("upstream_retries_total", "Upstream requests that were retried.", labels)
+    rejected = Counter("upstream_rejected_total", "Calls failed fast by an open circuit breaker.", labels)
+    in_flight = Gauge("upstream_requests_in_flight", "Upstream requests in progress.", labels)
+    circuit = Gauge("upstream_circuit_state", "Circuit breaker state (0 closed, 1 half open, 2 open).", labels)
+    for upstream, stats in pool_stats().items():
+        requests.inc(stats["requests"], upstream=upstream)
+        errors.inc(stats["errors"], upstream=upstream)
+        retries.inc(stats["retries"], upstream=upstream)
+        rejected.inc(stats["rejected"], upstream=upstream)
+        in_flight.set(stats["in_flight"], upstream=upstream)
+        if stats["circuit"] is not None:
+            circuit.set(CIRCUIT_STATES[stats["circuit"]["state"]], upstream=upstream)
+    return requests, errors, retries, rejected, in_flight, circuit
+
+
+def admission_metrics() -> Iterable[Metric]:
+    requests = Counter("http_admission_requests_total",
+                       "Requests by admission outcome; queued requests are also counted as admitted.",
+                       ("route_class", "outcome"))
+    in_flight = Gauge("http_admission_in_flight", "Admitted requests in progress.", ("route_class",))
+    queued = Gauge("http_admission_queued", "Requests waiting for an in-flight slot.", ("route_class",))
+    for route_class, stats in get_admission_controller().stats().items():
+        for outcome in OUTCOMES:
+            requests.inc(stats[outcome], route_class=route_class, outcome=outcome)
+        if stats["in_flight"] is not None:
+            in_flight.set(stats["in_flight"], route_class=route_class)
+        queued.set(stats["queued"], route_class=route_class)
+    return requests, in_flight, queued
+
+
+class MetricsCallbackHandler(UsageTracker):
+    """Feeds graph node and chain latencies and per-model usage into :class:`StormMetrics`."""
+
+    def __init__(self, metrics: StormMetrics):
+        super().__init__()
+        self.metrics = metrics
+        self._runs: Dict[UUID, Tuple[str, Dict[str, str], float]] = {}
+
+    async def on_chain_start(self, serialized: Dict[str, Any], inputs: Any, *, run_id: UUID,
+                             metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        name = kwargs.get("name") or ""
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and name == node and not node.startswith("__"):
+            labels = {"graph": self.metrics.graph_nodes.get(node, "unknown"), "node": node}
+            self.metrics.nodes_in_flight.inc(**labels)
+            self._runs[run_id] = ("node", labels, time.perf_counter())
+        elif name in self.metrics.chains:
+            self._runs[run_id] = ("chain", {"chain": name}, time.perf_counter())
+
+    async def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "ok")
+
+    async def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "error")
+
+    def _finish(self, run_id: UUID, status: str):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        kind, labels, started_at = run
+        elapsed = time.perf_counter() - started_at
+        if kind == "node":
+            self.metrics.nodes_in_flight.dec(**labels)
+            self.metrics.node_duration.observe(elapsed, **labels)
+            self.metrics.node_runs.inc(status=status, **labels)
+        else:
+            self.metrics.chain_duration.observe(elapsed, **labels)
+            self.metrics.chain_runs.inc(status=status, **labels)
+
+    def record_cached(self, model: str):
+        super().record_cached(model)
+        self.metrics.model_calls.inc(model=model, cached="true")
+
+    def record_usage(self, model: str, input_tokens: int, output_tokens: int):
+        super().record_usage(model, input_tokens, output_tokens)
+        self.metrics.model_calls.inc(model=model, cached="false")
+        self.metrics.model_tokens.inc(input_tokens, model=model, kind="prompt")
+        self.metrics.model_tokens.inc(output_tokens, model=model, kind="completion")
+        self.metrics.model_cost.inc(estimate_cost(model, input_tokens, output_tokens), model=model)
+
+
+@lru_cache()
+def get_metrics() -> StormMetrics:
+    return StormMetrics()
+
+
+@lru_cache()
+def get_metrics_handler() -> MetricsCallbackHandler:
+    """Process-wide callback handler; attach it to a run's config to instrument the run."""
+    return MetricsCallbackHandler(get_metrics())
@@ -0,0 +1,66 @@
+# app/service/model_router.py
+import logging
+from typing import Any, Dict, Optional
+
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+from app.service.clients import get_chat_model
+from app.service.context_packer import count_tokens
+from app.service.metrics import get_metrics
+from app.setting import get_config
+
+MODEL_TIER_KEY = "model_tier"
+FAST, LONG = "fast", "long"
+
+
+class ModelRouter:
+    """Sends a rendered prompt to the fast model unless it is over ``threshold`` tokens.
+
+    Callers that know they need the long-context model can force a tier by setting
+    ``configurable["model_tier"]`` to ``"long"`` (or ``"fast"``). A threshold of 0
+    always picks the long-context model.
+    """
+
+    def __init__(self, name: str, fast: Runnable, long: Runnable, fast_model: str, long_model: str,
+                 threshold: int):
+        self.name = name
+        self.tiers: Dict[str, Runnable] = {FAST: fast, LONG: long}
+        self.models = {FAST: fast_model, LONG: long_model}
+        self.threshold = threshold
+        self._logger = logging.getLogger(__name__)
+
+    def choose(self, prompt: PromptValue, config: Optional[RunnableConfig] = None) -> str:
+        forced = ((config or {}).get("configurable") or {}).get(MODEL_TIER_KEY)
+        if forced in self.tiers:
+            self._logger.info("Routing %s to %s (forced)", self.name, self.models[forced])
+            return forced
+        if self.threshold <= 0:
+            return LONG
+        tokens = count_tokens(prompt.to_string(), self.models[FAST])
+        tier = LONG if tokens > self.threshold else FAST
+        self._logger.info("Routing %s to %s (%d prompt tokens, threshold %d)",
+                          self.name, self.models[tier], tokens, self.threshold)
+        return tier
+
+    def route(self, prompt: PromptValue, config: RunnableConfig) -> Runnable:
+        tier = self.choose(prompt, config)
+        get_metrics().model_routes.inc(chain=self.name, model=self.models[tier])
+        # A Runnable returned by a RunnableLambda is invoked (or streamed) with the same input
+        return self.tiers[tier]
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.route, name=f"{self.name}_router")
+
+
+def tiered_model(name: str, fast_model: str, long_model: str, structured_output: Optional[Any] = None,
+                 streaming: bool = False, threshold: Optional[int] = None) -> Runnable:
+    """Shared chat models for both tiers behind a :class:`ModelRouter`, optionally with structured output."""
+
+    def build(model: str) -> Runnable:
+        llm = get_chat_model(model, streaming=streaming)
+        return llm.with_structured_output(structured_output) if structured_output is not None else llm
+
+    if threshold is None:
+        threshold = get_config().MODEL_ROUTING_TOKEN_THRESHOLD
+    return ModelRouter(name, build(fast_model), build(long_model), fast_model, long_model, threshold).as_runnable()
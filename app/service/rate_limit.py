@@ -0,0 +1,64 @@
+# app/service/rate_limit.py
+import asyncio
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+
+from app.setting import get_config
+
+
+class TokenBucket:
+    """Async token bucket refilling at ``rate`` tokens per second up to ``capacity``.
+
+    Callers reserve tokens up front (the balance may go negative) and sleep off their
+    share of the deficit, so waiters are served in arrival order without a lock.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.waited_seconds = 0.0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    async def acquire(self, tokens: float = 1.0):
+        self._refill()
+        self._tokens -= tokens
+        if self._tokens < 0:
+            delay = -self._tokens / self.rate
+            self.waited_seconds += delay
+            await asyncio.sleep(delay)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens only if they are there now; otherwise return the seconds until they will be."""
+        wait = self.wait_time(tokens)
+        if wait == 0:
+            self._tokens -= tokens
+        return wait
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until ``tokens`` will be there, 0 if they are now; nothing is taken."""
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def stats(self) -> Dict[str, float]:
+        return {"rate": self.rate, "capacity": self.capacity, "waited_seconds": round(self.waited_seconds, 3)}
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter(upstream: str) -> Optional[TokenBucket]:
+    """Process-wide request rate limit for an upstream, or None when unlimited."""
+    settings = get_config()
+    rate = {
+        "openai": settings.OPENAI_REQUESTS_PER_SECOND,
+        "tavily": settings.TAVILY_REQUESTS_PER_SECOND,
+        "wikipedia": settings.WIKIPEDIA_REQUESTS_PER_SECOND,
+    }.get(upstream)
+    if not rate:
+        return None
+    return TokenBucket(rate, capacity=rate * settings.RATE_LIMIT_BURST_SECONDS)
@@ -0,0 +1,151 @@
+# app/service/resilience.py
+import email.utils
+import random
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+
+import httpx
+
+from app.setting import get_config
+
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+# Statuses that mean "slow down" rather than "the upstream is broken"
+THROTTLING_STATUS_CODES = frozenset({408, 409, 429})
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without calling the upstream while its circuit breaker is open."""
+
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds the upstream asked us to wait, from ``retry-after-ms`` or ``Retry-After``."""
+    retry_after_ms = response.headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(float(retry_after_ms) / 1000, 0.0)
+        except ValueError:
+            pass
+    retry_after = response.headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class BackoffPolicy:
+    """When and how long to wait before retrying an upstream call.
+
+    Delays use full jitter over an exponential envelope, unless the upstream sent a
+    ``Retry-After``, which is honored as long as it is within ``max_delay``.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry_response(self, response: httpx.Response) -> bool:
+        return response.status_code in RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def should_retry_exception(exception: Exception) -> bool:
+        return isinstance(exception, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> Optional[float]:
+        """Seconds to wait after failed ``attempt`` (1-based), or None to give up."""
+        if attempt >= self.max_attempts:
+            return None
+        retry_after = parse_retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Fails calls fast after ``failure_threshold`` consecutive upstream failures.
+
+    After ``reset_seconds`` one trial call is let through (half-open); its success closes
+    the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or (self._opened_at is None and self.failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self.opened += 1
+        self._trial_in_flight = False
+
+    def record_abandoned(self):
+        # A cancelled call proves nothing either way; let another trial through
+        self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, object]:
+        return {"state": self.state, "consecutive_failures": self.failures, "opened": self.opened}
+
+
+def backoff_policy() -> BackoffPolicy:
+    settings = get_config()
+    return BackoffPolicy(
+        max_attempts=settings.RETRY_MAX_ATTEMPTS,
+        base_delay=settings.RETRY_BASE_DELAY_SECONDS,
+        max_delay=settings.RETRY_MAX_DELAY_SECONDS,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_circuit_breaker(upstream: str) -> CircuitBreaker:
+    settings = get_config()
+    return CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS)
+
+
+def is_upstream_error(exception: Exception) -> bool:
+    # openai and langgraph are imported here, not at module level: the pooled clients
+    # import this module and must stay cheap to import
+    import openai
+
+    return isinstance(exception, (openai.APIError, httpx.HTTPError))
+
+
+def retry_node_on(exception: Exception) -> bool:
+    """Node-level retry predicate: upstream calls were already retried one by one by the clients."""
+    from langgraph.types import default_retry_on
+
+    return not is_upstream_error(exception) and default_retry_on(exception)
@@ -0,0 +1,75 @@
+# app/service/search.py
+import asyncio
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Union
+
+from app.service.cache import LRUTTLCache
+from app.service.clients import get_http_client
+from app.service.single_flight import SingleFlight
+from app.service.utils import normalize_topic
+from app.setting import get_config
+
+SearchResults = List[Dict[str, str]]
+
+
+class TavilySearch:
+    """Async Tavily search over the shared HTTP pool.
+
+    Results are memoized per normalized query for a TTL, and identical queries issued
+    concurrently (e.g. by several editors' interviews) share one upstream request.
+    """
+
+    def __init__(self, api_key: str, max_results: int = 4, max_concurrency: int = 4,
+                 ttl_seconds: Optional[float] = None, max_entries: int = 4096):
+        self.api_key = api_key
+        self.max_results = max_results
+        self.max_concurrency = max_concurrency
+        self.memo = LRUTTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.flight = SingleFlight()
+
+    async def search(self, query: str) -> SearchResults:
+        key = normalize_topic(query)
+        results = self.memo.get(key)
+        if results is not None:
+            return results
+        return await self.flight.do(key, lambda: self._fetch(key, query))
+
+    async def search_many(self, queries: Sequence[str], max_concurrency: Optional[int] = None
+                          ) -> List[Union[SearchResults, Exception]]:
+        """Run queries concurrently, at most ``max_concurrency`` at a time, keeping input order.
+
+        The cap covers this call only, i.e. one interview turn's queries; the process-wide
+        limit on Tavily is the rate limiter on its HTTP pool.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def run(query: str) -> SearchResults:
+            async with semaphore:
+                return await self.search(query)
+
+        return await asyncio.gather(*(run(query) for query in queries), return_exceptions=True)
+
+    async def _fetch(self, key: str, query: str) -> SearchResults:
+        response = await get_http_client("tavily").post(
+            "/search",
+            json={"api_key": self.api_key, "query": query, "max_results": self.max_results},
+        )
+        response.raise_for_status()
+        results = [
+            {"content": result["content"], "url": result["url"], "score": result.get("score")}
+            for result in response.json().get("results", [])
+        ]
+        self.memo.set(key, results)
+        return results
+
+
+@lru_cache()
+def get_search_engine() -> TavilySearch:
+    settings = get_config()
+    return TavilySearch(
+        api_key=settings.TAVILY_API_KEY,
+        max_results=settings.SEARCH_MAX_RESULTS,
+        max_concurrency=settings.SEARCH_MAX_CONCURRENCY,
+        ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+        max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    )
@@ -0,0 +1,109 @@
+# app/service/section_pipeline.py
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.utils.json import parse_partial_json
+from pydantic import ValidationError
+
+from app.service.models import Outline, Section, WikiSection
+
+
+class SectionPipeline:
+    """Writes outline sections in the background as soon as each one is final.
+
+    Each section is written against the outline text it was dispatched with. Sections
+    are keyed by their position in the outline. Dispatching a section again with
+    different content replaces its task, so the final outline always wins over what was
+    seen while it streamed. At most ``max_concurrency`` sections are written at once.
+    """
+
+    def __init__(self, write: Callable[[Section, str], Awaitable[WikiSection]], max_concurrency: int = 8):
+        self._write = write
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Dict[int, Tuple[Section, asyncio.Task]] = {}
+        # Tasks run in the dispatching node's context (tracing, streaming), not a callback's
+        self._context = contextvars.copy_context()
+
+    def dispatch(self, index: int, section: Section, outline: str):
+        current = self._tasks.get(index)
+        if current is not None:
+            # Only a changed section is rewritten; the rest of the outline moving on is not enough
+            if current[0] == section:
+                return
+            current[1].cancel()
+        task = asyncio.get_running_loop().create_task(self._run(section, outline), context=self._context.copy())
+        self._tasks[index] = (section, task)
+
+    async def results(self, sections: Sequence[Section], outline: str) -> List[WikiSection]:
+        """Written sections in outline order, dispatching any section not started yet against ``outline``."""
+        for index, section in enumerate(sections):
+            self.dispatch(index, section, outline)
+        for index in [index for index in self._tasks if index >= len(sections)]:
+            self._tasks.pop(index)[1].cancel()
+        try:
+            return await asyncio.gather(*(self._tasks[index][1] for index in range(len(sections))))
+        except Exception:
+            # Forget failed sections so a retry of the node writes them again
+            for index, (_, task) in list(self._tasks.items()):
+                if task.done() and (task.cancelled() or task.exception() is not None):
+                    del self._tasks[index]
+            raise
+
+    def cancel(self):
+        for _, task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    async def _run(self, section: Section, outline: str) -> WikiSection:
+        async with self._semaphore:
+            return await self._write(section, outline)
+
+
+class OutlineSectionStreamer(AsyncCallbackHandler):
+    """Feeds sections of a streaming ``Outline`` tool call to a :class:`SectionPipeline`.
+
+    A section is final once the model starts emitting the next one; the last section is
+    only known when the call completes and is left to :meth:`SectionPipeline.results`.
+    Each section is written against the refined outline as far as it has streamed, i.e.
+    up to and including that section.
+    """
+
+    def __init__(self, pipeline: SectionPipeline):
+        self.pipeline = pipeline
+        self.dispatched = 0
+        self.sections: List[Section] = []
+        self._run_id: Optional[UUID] = None
+        self._arguments = ""
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[Any], *, run_id: UUID,
+                                  **kwargs: Any) -> None:
+        if self._run_id is None:
+            self._run_id = run_id
+
+    async def on_llm_new_token(self, token: str, *, chunk: Any = None, run_id: UUID, **kwargs: Any) -> None:
+        if run_id != self._run_id or chunk is None:
+            return
+        new_arguments = "".join(
+            tool_call_chunk.get("args") or ""
+            for tool_call_chunk in getattr(chunk.message, "tool_call_chunks", [])
+            if tool_call_chunk.get("index") in (0, None)
+        )
+        self._arguments += new_arguments
+        # A section can only have become final when the next one opens
+        if "{" not in new_arguments:
+            return
+        partial = parse_partial_json(self._arguments)
+        sections = partial.get("sections") if isinstance(partial, dict) else None
+        while isinstance(sections, list) and self.dispatched < len(sections) - 1:
+            try:
+                section = Section.model_validate(sections[self.dispatched])
+            except ValidationError:
+                return
+            self.sections.append(section)
+            page_title = partial.get("page_title")
+            outline = Outline(page_title=page_title if isinstance(page_title, str) else "", sections=self.sections)
+            self.pipeline.dispatch(self.dispatched, section, outline.as_str)
+            self.dispatched += 1
@@ -0,0 +1,90 @@
+# app/service/usage.py
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# USD per million (input, output) tokens
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "text-embedding-3-small": (0.02, 0.0),
+}
+CACHE_HIT_KEY = "cache_hit"
+
+
+def model_price(model: str) -> Tuple[float, float]:
+    # Dated snapshots ("gpt-4o-2024-08-06") are priced as their base model
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_PRICES[name]
+    return MODEL_PRICES["gpt-4o"]
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = model_price(model)
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class UsageTracker(AsyncCallbackHandler):
+    """Sums tokens and estimated cost of the chat model calls it is attached to.
+
+    Responses served by the LLM response cache are counted as calls but cost nothing.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.cached_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self._models: Dict[UUID, str] = {}
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID,
+                                  metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        invocation_params = kwargs.get("invocation_params") or {}
+        self._models[run_id] = (
+            (metadata or {}).get("ls_model_name") or invocation_params.get("model_name")
+            or invocation_params.get("model") or ""
+        )
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        model = self._models.pop(run_id, "")
+        self.calls += 1
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if message is None:
+                    continue
+                message_model = message.response_metadata.get("model_name") or model
+                if message.response_metadata.get(CACHE_HIT_KEY):
+                    self.record_cached(message_model)
+                    continue
+                usage = getattr(message, "usage_metadata", None) or {}
+                self.record_usage(message_model, usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+    def record_cached(self, model: str):
+        self.cached_calls += 1
+
+    def record_usage(self, model: str, input_tokens: int, output_tokens: int):
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.cost += estimate_cost(model, input_tokens, output_tokens)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._models.pop(run_id, None)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "cached_calls": self.cached_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost": round(self.cost, 6),
+        }
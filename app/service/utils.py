@@ -1,21 +1,38 @@
 # utils.py
 from langchain_core.messages import AIMessage, HumanMessage
-from langchain_community.retrievers import WikipediaRetriever
 
-wikipedia_retriever = WikipediaRetriever(load_all_available_meta=True, top_k_results=1)
+from app.service.context_packer import NearDuplicateFilter, count_tokens, truncate_to_tokens
+
 # app/service/utils.py
 
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.split()).casefold()
+
 def format_conversation(interview_state):
     messages = interview_state["messages"]
     convo = "\n".join(f"{m.name}: {m.content}" for m in messages)
     return f'Conversation with {interview_state["editor"].name}\n\n' + convo
 
-def format_doc(doc, max_length=1000):
+def format_doc(doc, max_tokens=250, model="gpt-4o-mini"):
+    # Shorten only the summary so the title and categories always survive
     related = "- ".join(doc.metadata.get("categories", []))
-    return f"### {doc.metadata.get('title', '')}\n\nSummary: {doc.page_content}\n\nRelated\n{related}"[:max_length]
+    header = f"### {doc.metadata.get('title', '')}\n\nSummary: "
+    footer = f"\n\nRelated\n{related}"
+    summary_tokens = max(max_tokens - count_tokens(header + footer, model), 0)
+    return f"{header}{truncate_to_tokens(doc.page_content, summary_tokens, model)}{footer}"
 
-def format_docs(docs):
-    return "\n\n".join(format_doc(doc) for doc in docs)
+def format_docs(docs, max_tokens=None, model="gpt-4o-mini", max_doc_tokens=250):
+    """Join formatted docs in retrieval order, skipping near-duplicates, within max_tokens."""
+    duplicates = NearDuplicateFilter()
+    formatted = []
+    for doc in docs:
+        if not duplicates.accept(doc.page_content):
+            continue
+        formatted.append(format_doc(doc, max_doc_tokens, model))
+    if max_tokens is not None:
+        while formatted and count_tokens("\n\n".join(formatted), model) > max_tokens:
+            formatted.pop()
+    return "\n\n".join(formatted)
 
 def tag_with_name(ai_message: AIMessage, name: str):
     ai_message.name = name
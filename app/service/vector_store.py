@@ -0,0 +1,281 @@
+# app/service/vector_store.py
+import asyncio
+import contextlib
+import hashlib
+import os
+import threading
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from numpy.lib.format import open_memmap
+
+from app.service.clients import get_embeddings
+from app.setting import get_config
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+class EmbeddingCache:
+    """Append-only store of float32 vectors keyed by content hash, memory-mapped from disk.
+
+    Vectors live in ``embeddings.npy`` (rows) and their hashes in ``embeddings.keys`` (one
+    per line, row order), so a restart maps the file and skips re-embedding. The file is
+    grown by doubling when full. Worker processes sharing the directory serialize writes
+    on a lock file and pick up each other's rows.
+    """
+
+    def __init__(self, directory: str, initial_capacity: int = 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.matrix_path = os.path.join(directory, "embeddings.npy")
+        self.keys_path = os.path.join(directory, "embeddings.keys")
+        self.lock_path = os.path.join(directory, "embeddings.lock")
+        self.initial_capacity = initial_capacity
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._count = 0
+        self._matrix: Optional[np.memmap] = None
+        with self._lock, self._file_lock():
+            self._sync()
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        # Serializes writers across worker processes sharing the directory
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sync(self):
+        """Pick up rows appended by other processes since we last read the keys file."""
+        if not os.path.exists(self.keys_path) or not os.path.exists(self.matrix_path):
+            return
+        with open(self.keys_path) as keys_file:
+            keys_file.seek(self._keys_offset)
+            appended = keys_file.read()
+        if not appended and self._matrix is not None:
+            return
+        # Only consume whole lines; a key is written after its vector is flushed
+        complete = appended[: appended.rfind("\n") + 1]
+        self._keys_offset += len(complete.encode())
+        for key in complete.split():
+            self._rows.setdefault(key, self._count)
+            self._count += 1
+        self._matrix = np.load(self.matrix_path, mmap_mode="r+")
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            return [
+                np.array(self._matrix[self._rows[key]]) if key in self._rows else None
+                for key in keys
+            ]
+
+    def put_many(self, keys: Sequence[str], vectors: np.ndarray):
+        with self._lock, self._file_lock():
+            self._sync()
+            new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._rows]
+            if not new:
+                return
+            self._reserve(self._count + len(new), vectors.shape[1])
+            start = self._count
+            for offset, (_, vector) in enumerate(new):
+                self._matrix[start + offset] = vector
+            self._matrix.flush()
+            appended = "".join(f"{key}\n" for key, _ in new)
+            with open(self.keys_path, "a") as keys_file:
+                keys_file.write(appended)
+            self._keys_offset += len(appended.encode())
+            for offset, (key, _) in enumerate(new):
+                self._rows[key] = start + offset
+            self._count += len(new)
+
+    def _reserve(self, rows: int, dimensions: int):
+        if self._matrix is not None and rows <= self._matrix.shape[0]:
+            return
+        capacity = max(self.initial_capacity, rows)
+        if self._matrix is not None:
+            capacity = max(capacity, self._matrix.shape[0] * 2)
+        temporary_path = f"{self.matrix_path}.tmp"
+        grown = open_memmap(temporary_path, mode="w+", dtype=np.float32, shape=(capacity, dimensions))
+        if self._matrix is not None:
+            grown[: self._count] = self._matrix[: self._count]
+        grown.flush()
+        del grown
+        self._matrix = None
+        os.replace(temporary_path, self.matrix_path)
+        self._matrix = np.load(self.matrix_path, mmap_mode="r+")
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends texts it has never embedded, in one batch."""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, namespace: str):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.namespace = namespace
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{text}".encode()).hexdigest()
+
+    def _plan(self, texts: List[str]):
+        keys = [self._key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = {key: text for key, text, vector in zip(keys, texts, cached) if vector is None}
+        return keys, cached, missing
+
+    def _merge(self, keys, cached, missing: Dict[str, str], embedded: List[List[float]]) -> List[List[float]]:
+        if missing:
+            vectors = np.asarray(embedded, dtype=np.float32)
+            self.cache.put_many(list(missing), vectors)
+            fresh = dict(zip(missing, vectors))
+            cached = [vector if vector is not None else fresh[key] for key, vector in zip(keys, cached)]
+        return [vector.tolist() for vector in cached]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._plan(texts)
+        embedded = self.embeddings.embed_documents(list(missing.values())) if missing else []
+        return self._merge(keys, cached, missing, embedded)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Cache reads and writes wait on locks and touch files, so they stay off the event loop
+        keys, cached, missing = await asyncio.to_thread(self._plan, texts)
+        if not missing:
+            return self._merge(keys, cached, missing, [])
+        embedded = await self.embeddings.aembed_documents(list(missing.values()))
+        return await asyncio.to_thread(self._merge, keys, cached, missing, embedded)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class NumpyVectorStore(VectorStore):
+    """Vector store keeping unit-normalized float32 embeddings in one contiguous matrix.
+
+    Similarity is cosine, computed for a whole batch of queries with a single matrix
+    product and ``argpartition`` top-k. Concurrent :meth:`asimilarity_search` calls, e.g.
+    from sections written in parallel, are coalesced into one such batch.
+    """
+
+    def __init__(self, embedding: Embeddings):
+        self.embedding = embedding
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._documents: List[Document] = []
+        self._pending: List[Tuple[str, int, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        return self._append(texts, metadatas, self.embedding.embed_documents(texts), kwargs.get("ids"))
+
+    async def aadd_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                         **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        vectors = await self.embedding.aembed_documents(texts)
+        return self._append(texts, metadatas, vectors, kwargs.get("ids"))
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self._search(np.asarray([self.embedding.embed_query(query)], dtype=np.float32), k)[0]
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, k, future))
+        if len(self._pending) == 1:
+            # Runs once the callers that are ready now have queued their queries too
+            self._flush_task = loop.create_task(self._flush())
+        return await future
+
+    async def _flush(self):
+        pending, self._pending = self._pending, []
+        pending = [(query, k, future) for query, k, future in pending if not future.done()]
+        if not pending:
+            return
+        try:
+            results = await self.asimilarity_search_batch([query for query, _, _ in pending],
+                                                          max(k for _, k, _ in pending))
+        except Exception as exception:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(exception)
+            return
+        for (_, k, future), documents in zip(pending, results):
+            if not future.done():
+                future.set_result(documents[:k])
+
+    async def asimilarity_search_batch(self, queries: Sequence[str], k: int = 4) -> List[List[Document]]:
+        """Top-k documents for every query, embedding all queries in one request."""
+        if not queries or not self._documents:
+            return [[] for _ in queries]
+        vectors = await self.embedding.aembed_documents(list(queries))
+        return self._search(np.asarray(vectors, dtype=np.float32), k)
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(embedding)
+        store.add_texts(texts, metadatas, **kwargs)
+        return store
+
+    def _append(self, texts: List[str], metadatas: Optional[List[dict]], vectors, ids: Optional[List[str]]):
+        if not texts:
+            return []
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        self._matrix = matrix if not self._documents else np.concatenate([self._matrix, matrix])
+        self._documents.extend(
+            Document(id=id_, page_content=text, metadata=metadata)
+            for id_, text, metadata in zip(ids, texts, metadatas)
+        )
+        return ids
+
+    def _search(self, queries: np.ndarray, k: int) -> List[List[Document]]:
+        if not self._documents:
+            return [[] for _ in range(len(queries))]
+        scores = _normalize(queries) @ self._matrix.T
+        k = min(k, len(self._documents))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        ordered = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+        return [[self._documents[index] for index in row] for row in ordered]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.ascontiguousarray(matrix / np.where(norms == 0, 1, norms), dtype=np.float32)
+
+
+@lru_cache(maxsize=None)
+def get_cached_embeddings(model: str = "text-embedding-3-small") -> Embeddings:
+    """Return the model's embeddings, backed by the on-disk embedding cache when configured."""
+    settings = get_config()
+    directory = settings.EMBEDDING_CACHE_DIRECTORY
+    # Fake vectors must never land in the cache real embeddings are read from
+    if not directory or settings.BACKENDS == "fake":
+        return get_embeddings(model)
+    return CachedEmbeddings(get_embeddings(model), EmbeddingCache(os.path.join(directory, model)), model)
@@ -0,0 +1,117 @@
+# app/service/wiki_retriever.py
+import asyncio
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from langchain_core.documents import Document
+
+from app.service.cache import SQLiteCache
+from app.service.clients import get_http_client
+from app.service.utils import normalize_topic
+from app.setting import get_config
+
+WIKIPEDIA_MAX_QUERY_LENGTH = 300
+USER_AGENT = "HealMate/1.0 (https://github.com/tabrezdn1/hacknjit24-be)"
+
+
+class WikipediaPageRetriever:
+    """Async Wikipedia lookup that fetches only what ``format_doc`` renders.
+
+    A single MediaWiki API call per topic resolves the best search hit and returns its
+    plain-text intro and visible categories. Pages are cached by title, and topics map to
+    titles, in a local SQLite file, so repeated and overlapping topics skip the network.
+    """
+
+    def __init__(self, cache: Optional[SQLiteCache] = None, max_concurrency: int = 8):
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+
+    async def aretrieve(self, topic: str) -> List[Document]:
+        topic_key = f"topic:{normalize_topic(topic)}"
+        title = await self._cache_get(topic_key)
+        if title is not None:
+            if not title:
+                return []
+            page = await self._cache_get(f"page:{title}")
+            if page is not None:
+                return [self._to_document(json.loads(page))]
+        page = await self._fetch(topic)
+        await self._cache_set(topic_key, page["title"] if page else "")
+        if page is None:
+            return []
+        await self._cache_set(f"page:{page['title']}", json.dumps(page))
+        return [self._to_document(page)]
+
+    async def abatch(self, topics: Sequence[str], return_exceptions: bool = False
+                     ) -> List[Union[List[Document], Exception]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(topic: str) -> List[Document]:
+            async with semaphore:
+                return await self.aretrieve(topic)
+
+        return await asyncio.gather(*(run(topic) for topic in topics), return_exceptions=return_exceptions)
+
+    async def _fetch(self, topic: str) -> Optional[Dict[str, Any]]:
+        response = await get_http_client("wikipedia").get(
+            "/w/api.php",
+            params={
+                "action": "query",
+                "format": "json",
+                "formatversion": "2",
+                "redirects": "1",
+                "generator": "search",
+                "gsrsearch": topic[:WIKIPEDIA_MAX_QUERY_LENGTH],
+                "gsrlimit": "1",
+                "prop": "extracts|categories|info",
+                "inprop": "url",
+                "exintro": "1",
+                "explaintext": "1",
+                "clshow": "!hidden",
+                "cllimit": "max",
+            },
+            headers={"User-Agent": USER_AGENT},
+        )
+        response.raise_for_status()
+        pages = response.json().get("query", {}).get("pages", [])
+        if not pages:
+            return None
+        page = pages[0]
+        return {
+            "title": page["title"],
+            "summary": page.get("extract", ""),
+            "categories": [
+                category["title"].removeprefix("Category:") for category in page.get("categories", [])
+            ],
+            "source": page.get("fullurl", ""),
+        }
+
+    @staticmethod
+    def _to_document(page: Dict[str, Any]) -> Document:
+        return Document(
+            page_content=page["summary"],
+            metadata={"title": page["title"], "categories": page["categories"], "source": page["source"]},
+        )
+
+    async def _cache_get(self, key: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        raw = await asyncio.to_thread(self.cache.get, key)
+        return raw.decode() if raw is not None else None
+
+    async def _cache_set(self, key: str, value: str):
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set, key, value.encode())
+
+
+@lru_cache()
+def get_wikipedia_retriever() -> WikipediaPageRetriever:
+    settings = get_config()
+    cache = None
+    if settings.WIKIPEDIA_CACHE_PATH:
+        cache = SQLiteCache(settings.WIKIPEDIA_CACHE_PATH, table="wikipedia_pages",
+                            ttl_seconds=settings.WIKIPEDIA_CACHE_TTL_SECONDS,
+                            max_entries=settings.WIKIPEDIA_CACHE_MAX_ENTRIES,
+                            purge_interval_seconds=settings.SQLITE_CACHE_PURGE_INTERVAL_SECONDS)
+    return WikipediaPageRetriever(cache, max_concurrency=settings.WIKIPEDIA_MAX_CONCURRENCY)
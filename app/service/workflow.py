@@ -1,36 +1,51 @@
 # app/service/workflow.py
 
 import asyncio
-from typing import Dict, Any
-from langchain_core.messages import AIMessage
+import logging
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Dict, Any, AsyncIterator, List, Optional, Set, Tuple
+from uuid import uuid4
+from langchain_core.messages import AIMessage, AIMessageChunk
 from langchain_core.documents import Document
-from langchain_community.vectorstores import InMemoryVectorStore
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
 from langgraph.graph import StateGraph, START, END
 from langgraph.pregel import RetryPolicy
 from langgraph.checkpoint.memory import MemorySaver
 
 # Import your chains and utilities
+from app.exception.application_exception import ApplicationException
 from app.service.chains import (
-    generate_outline_direct,
+    get_generate_outline_chain,
+    get_interview_graph,
+    get_refine_outline_chain,
+    get_section_writer,
+    get_writer,
     survey_subjects,
-    interview_graph,
-    refine_outline_chain,
-    section_writer,
-    writer,
 )
+from app.service.checkpoint import SQLiteSaver
+from app.service.interview_scheduler import InterviewScheduler
+from app.service.metrics import get_metrics, get_metrics_handler
+from app.service.models import Section, WikiSection
+from app.service.resilience import retry_node_on
+from app.service.section_pipeline import OutlineSectionStreamer, SectionPipeline
 from app.service.utils import format_conversation
+from app.service.vector_store import NumpyVectorStore, get_cached_embeddings
 from app.setting import get_config
 
 settings=get_config()
-# Initialize embeddings and vector store
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small",api_key=settings.OPENAI_API_KEY)
-vectorstore = InMemoryVectorStore(embedding=embeddings)
+logger = logging.getLogger(__name__)
+# Each run indexes its references in its own store
+reference_stores: Dict[str, NumpyVectorStore] = {}
+section_pipelines: Dict[str, SectionPipeline] = {}
+# Threads with a run streaming in this process
+active_storm_threads: Set[str] = set()
 
 async def initialize_research(state: Dict[str, Any]):
     topic = state["topic"]
     coros = (
-        generate_outline_direct.ainvoke({"topic": topic}),
+        get_generate_outline_chain().ainvoke({"topic": topic}),
         survey_subjects.ainvoke(topic),
     )
     results = await asyncio.gather(*coros)
@@ -40,7 +55,7 @@ async def initialize_research(state: Dict[str, Any]):
         "editors": results[1].editors,
     }
 
-async def conduct_interviews(state: Dict[str, Any]):
+async def conduct_interviews(state: Dict[str, Any], config: RunnableConfig):
     topic = state["topic"]
     initial_states = [
         {
@@ -54,52 +69,92 @@ async def conduct_interviews(state: Dict[str, Any]):
         }
         for editor in state["editors"]
     ]
-    # Parallelize the interviews
-    interview_results = await interview_graph.abatch(initial_states)
+    # Interviews run concurrently, within the global interview cap and this run's budget
+    scheduler = InterviewScheduler.from_settings()
+    interview_results = await scheduler.run(get_interview_graph(), initial_states, config)
     return {
         **state,
         "interview_results": interview_results,
     }
 
-async def refine_outline(state: Dict[str, Any]):
-    convos = "\n\n".join(
-        [
-            format_conversation(interview_state)
-            for interview_state in state["interview_results"]
-        ]
-    )
-    updated_outline = await refine_outline_chain.ainvoke(
-        {
-            "topic": state["topic"],
-            "old_outline": state["outline"].as_str,
-            "conversations": convos,
-        }
-    )
-    return {**state, "outline": updated_outline}
+def run_namespace(config: RunnableConfig) -> str:
+    return config["configurable"]["thread_id"]
 
-async def index_references(state: Dict[str, Any]):
+async def build_reference_store(state: Dict[str, Any]) -> NumpyVectorStore:
     all_docs = []
     for interview_state in state["interview_results"]:
         reference_docs = [
             Document(page_content=v, metadata={"source": k})
-            for k, v in interview_state.get("references", {}).items()
+            for k, v in (interview_state.get("references") or {}).items()
         ]
         all_docs.extend(reference_docs)
-    await vectorstore.aadd_documents(all_docs)
+    store = NumpyVectorStore(get_cached_embeddings("text-embedding-3-small"))
+    if all_docs:
+        await store.aadd_documents(all_docs)
+    return store
+
+async def index_references(state: Dict[str, Any], config: RunnableConfig):
+    reference_stores[run_namespace(config)] = await build_reference_store(state)
     return state
 
-async def write_sections(state: Dict[str, Any]):
-    outline = state["outline"]
-    sections = await section_writer.abatch(
-        [
+async def get_reference_store(state: Dict[str, Any], config: RunnableConfig) -> NumpyVectorStore:
+    store = reference_stores.get(run_namespace(config))
+    if store is None:  # e.g. the run resumed in a process that never indexed it
+        store = reference_stores[run_namespace(config)] = await build_reference_store(state)
+    return store
+
+def format_references(docs: List[Document]) -> str:
+    return "\n".join(
+        f'<Document href="{doc.metadata["source"]}"/>\n{doc.page_content}\n</Document>'
+        for doc in docs
+    )
+
+def new_section_pipeline(state: Dict[str, Any], config: RunnableConfig) -> SectionPipeline:
+    async def write_section(section: Section, outline: str) -> WikiSection:
+        store = await get_reference_store(state, config)
+        docs = await store.asimilarity_search(section.title, k=settings.SECTION_REFERENCES_K)
+        return await get_section_writer().ainvoke(
             {
-                "outline": state["outline"].as_str,
-                "section": section.section_title,
+                "outline": outline,
+                "section": section.title,
+                "docs": format_references(docs),
                 "topic": state["topic"],
             }
-            for section in outline.sections
+        )
+
+    pipeline = SectionPipeline(write_section, max_concurrency=settings.SECTION_WRITER_MAX_CONCURRENCY)
+    previous = section_pipelines.pop(run_namespace(config), None)
+    if previous is not None:  # the node is being retried
+        previous.cancel()
+    section_pipelines[run_namespace(config)] = pipeline
+    return pipeline
+
+async def refine_outline(state: Dict[str, Any], config: RunnableConfig):
+    convos = "\n\n".join(
+        [
+            format_conversation(interview_state)
+            for interview_state in state["interview_results"]
         ]
     )
+    # Sections are dispatched to writers while the refined outline is still streaming
+    pipeline = new_section_pipeline(state, config)
+    updated_outline = await get_refine_outline_chain().ainvoke(
+        {
+            "topic": state["topic"],
+            "old_outline": state["outline"].as_str,
+            "conversations": convos,
+        },
+        merge_configs(config, {"callbacks": [OutlineSectionStreamer(pipeline)]}),
+    )
+    return {**state, "outline": updated_outline}
+
+async def write_sections(state: Dict[str, Any], config: RunnableConfig):
+    pipeline = section_pipelines.get(run_namespace(config))
+    if pipeline is None:  # resumed after refine_outline in another process
+        pipeline = new_section_pipeline(state, config)
+    # Sections not started while the outline streamed are written against the final refined outline
+    sections = await pipeline.results(state["outline"].sections, state["outline"].as_str)
+    section_pipelines.pop(run_namespace(config), None)
     return {
         **state,
         "sections": sections,
@@ -109,7 +164,7 @@ async def write_article(state: Dict[str, Any]):
     topic = state["topic"]
     sections = state["sections"]
     draft = "\n\n".join([section.as_str for section in sections])
-    article = await writer.ainvoke({"topic": topic, "draft": draft})
+    article = await get_writer().ainvoke({"topic": topic, "draft": draft})
     return {
         **state,
         "article": article,
@@ -120,28 +175,152 @@ def build_storm_graph():
     nodes = [
         ("init_research", initialize_research),
         ("conduct_interviews", conduct_interviews),
-        ("refine_outline", refine_outline),
         ("index_references", index_references),
+        ("refine_outline", refine_outline),
         ("write_sections", write_sections),
         ("write_article", write_article),
     ]
     for i in range(len(nodes)):
         name, node = nodes[i]
-        builder.add_node(name, node, retry=RetryPolicy(max_attempts=3))
+        builder.add_node(name, node, retry=RetryPolicy(max_attempts=3, retry_on=retry_node_on))
         if i > 0:
             builder.add_edge(nodes[i - 1][0], name)
     builder.add_edge(START, nodes[0][0])
     builder.add_edge(nodes[-1][0], END)
-    storm = builder.compile(checkpointer=MemorySaver())
+    storm = builder.compile(checkpointer=get_checkpointer())
+    get_metrics().instrument_graph("storm", storm)
     return storm
 
+@lru_cache()
+def get_checkpointer():
+    """Durable SQLite checkpointer when STORM_CHECKPOINT_PATH is set, else in-memory."""
+    if not settings.STORM_CHECKPOINT_PATH:
+        return MemorySaver()
+    checkpointer = SQLiteSaver(settings.STORM_CHECKPOINT_PATH)
+    checkpointer.purge_older_than(settings.STORM_CHECKPOINT_TTL_SECONDS)
+    return checkpointer
+
+@lru_cache()
+def get_storm_graph():
+    """Return the process-wide compiled STORM graph."""
+    return build_storm_graph()
+
+def preload_storm():
+    """Build the STORM graph, chains, model clients and checkpointer ahead of the first request."""
+    get_storm_graph()
+    for provider in (get_generate_outline_chain, get_interview_graph, get_refine_outline_chain,
+                     get_section_writer, get_writer):
+        provider()
+    get_cached_embeddings("text-embedding-3-small")
+
+def new_storm_config() -> Dict[str, Any]:
+    return {"configurable": {"thread_id": f"storm-{uuid4().hex}"}}
+
+def instrumented_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    # Callbacks are inherited by every node, subgraph and chain of the run
+    return merge_configs(config, {"callbacks": [get_metrics_handler()]})
+
+def finish_run_metrics(completed: bool):
+    metrics = get_metrics()
+    metrics.runs_in_flight.dec()
+    metrics.runs.inc(status="completed" if completed else "failed")
+
+def release_run_resources(thread_id: str):
+    reference_stores.pop(thread_id, None)
+    pipeline = section_pipelines.pop(thread_id, None)
+    if pipeline is not None:
+        pipeline.cancel()
+
+def release_storm_thread(storm, config: Dict[str, Any]):
+    # The shared checkpointer outlives every run, so drop a finished thread's checkpoints
+    thread_id = config["configurable"]["thread_id"]
+    release_run_resources(thread_id)
+    checkpointer = storm.checkpointer
+    if isinstance(checkpointer, SQLiteSaver):
+        checkpointer.delete_thread(thread_id)
+        return
+    checkpointer.storage.pop(thread_id, None)
+    for key in [key for key in checkpointer.writes if key[0] == thread_id]:
+        checkpointer.writes.pop(key, None)
+
+def finish_storm_thread(storm, config: Dict[str, Any], completed: bool):
+    """Release a thread after a run; durable checkpoints of unfinished runs are kept for resuming."""
+    if completed or not isinstance(storm.checkpointer, SQLiteSaver):
+        release_storm_thread(storm, config)
+    else:
+        release_run_resources(config["configurable"]["thread_id"])
+
+def reject_running_thread(thread_id: str):
+    if thread_id in active_storm_threads:
+        raise ApplicationException(f"STORM run {thread_id} is still running", HTTPStatus.CONFLICT)
+
+async def resumable_storm_run(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the saved state of an interrupted run on this thread, or None if there is nothing to resume.
+
+    A run that is still executing also has pending nodes, so a thread running here is a 409.
+    """
+    reject_running_thread(config["configurable"]["thread_id"])
+    snapshot = await get_storm_graph().aget_state(config)
+    return snapshot.values if snapshot.next else None
+
+# State keys each node contributes, streamed to clients as the node completes
+STORM_NODE_OUTPUTS = {
+    "init_research": ("outline", "editors"),
+    "conduct_interviews": ("interview_results",),
+    "index_references": (),
+    "refine_outline": ("outline",),
+    "write_sections": ("sections",),
+    "write_article": ("article",),
+}
+
+async def stream_storm(topic: str, config: Optional[Dict[str, Any]] = None, resume: bool = False
+                       ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ("node", result) as each STORM node completes and ("token", delta) while the writer streams.
+
+    With ``resume`` the run on ``config``'s thread continues from its last checkpoint.
+    """
+    storm = get_storm_graph()
+    config = config or new_storm_config()
+    thread_id = config["configurable"]["thread_id"]
+    # Checked again here: two resumes of one thread may both get past resumable_storm_run
+    reject_running_thread(thread_id)
+    active_storm_threads.add(thread_id)
+    completed = False
+    get_metrics().runs_in_flight.inc()
+    try:
+        async for mode, chunk in storm.astream(
+            None if resume else {"topic": topic}, instrumented_config(config), stream_mode=["updates", "messages"]
+        ):
+            if mode == "updates":
+                for name, update in chunk.items():
+                    keys = STORM_NODE_OUTPUTS.get(name, ())
+                    yield "node", {"node": name, **{key: update[key] for key in keys if key in update}}
+                continue
+            message, metadata = chunk
+            if (
+                metadata.get("langgraph_node") == "write_article"
+                and isinstance(message, AIMessageChunk)
+                and message.content
+            ):
+                yield "token", {"node": "write_article", "content": message.content}
+        completed = True
+    finally:
+        active_storm_threads.discard(thread_id)
+        finish_run_metrics(completed)
+        finish_storm_thread(storm, config, completed)
+
 async def run_storm(topic: str):
-    storm = build_storm_graph()
-    config = {"configurable": {"thread_id": "user_thread"}}
-    async for step in storm.astream({"topic": topic}, config):
-        name = next(iter(step))
-        print(f"Step: {name}")
-        print(f"-- {str(step[name])[:300]}")
-    checkpoint = storm.get_state(config)
+    storm = get_storm_graph()
+    config = new_storm_config()
+    completed = False
+    get_metrics().runs_in_flight.inc()
+    try:
+        async for step in storm.astream({"topic": topic}, instrumented_config(config)):
+            logger.debug("STORM step %s finished", next(iter(step)))
+        checkpoint = storm.get_state(config)
+        completed = True
+    finally:
+        finish_run_metrics(completed)
+        finish_storm_thread(storm, config, completed)
     article = checkpoint.values["article"]
     return article
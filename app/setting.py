@@ -1,16 +1,27 @@
 import os
+import tempfile
 from functools import lru_cache
-from pydantic import ConfigDict
-from typing import Optional
+from pydantic import ConfigDict, model_validator
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     """Configuration Settings with Updated Environment Variables"""
 
-    # New API Keys
-    TAVILY_API_KEY: str
-    OPENAI_API_KEY: str
+    # New API Keys; only required with the live backends
+    TAVILY_API_KEY: str = ""
+    OPENAI_API_KEY: str = ""
+
+    # "fake" swaps OpenAI, Tavily, Wikipedia and embeddings for offline, deterministic stand-ins
+    BACKENDS: Literal["live", "fake"] = "live"
+    FAKE_LLM_LATENCY_MS: float = 800.0
+    FAKE_EMBEDDING_LATENCY_MS: float = 50.0
+    FAKE_SEARCH_LATENCY_MS: float = 300.0
+    FAKE_WIKIPEDIA_LATENCY_MS: float = 150.0
+    FAKE_LATENCY_DISTRIBUTION: Literal["constant", "uniform", "exponential", "lognormal"] = "lognormal"
+    FAKE_LATENCY_SIGMA: float = 0.5  # lognormal shape; larger means a longer tail
+    FAKE_SEED: int = 0
 
     # MongoDB Configuration
 
@@ -19,6 +30,132 @@ class Settings(BaseSettings):
     # Root and Log Directories
     APP_ROOT_DIRECTORY: str = os.getcwd()
     LOG_DIRECTORY: str = os.path.join(APP_ROOT_DIRECTORY, "logs")
+    DATA_DIRECTORY: str = os.path.join(APP_ROOT_DIRECTORY, "data")
+    # Disposable caches go to the temp directory, which stays writable where the app directory is read-only
+    CACHE_DIRECTORY: str = os.path.join(tempfile.gettempdir(), "healmate")
+
+    # Shared upstream HTTP connection pools
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_TIMEOUT_SECONDS: float = 60.0
+    HTTP2_ENABLED: bool = True
+
+    # Process-wide request rate limits per upstream (token buckets); 0 disables
+    OPENAI_REQUESTS_PER_SECOND: float = 50.0
+    TAVILY_REQUESTS_PER_SECOND: float = 10.0
+    WIKIPEDIA_REQUESTS_PER_SECOND: float = 50.0
+    RATE_LIMIT_BURST_SECONDS: float = 1.0  # bucket capacity, in seconds of the rate
+
+    # Per-call retries (429/5xx/timeouts) and per-upstream circuit breakers
+    RETRY_MAX_ATTEMPTS: int = 4
+    RETRY_BASE_DELAY_SECONDS: float = 0.5
+    RETRY_MAX_DELAY_SECONDS: float = 30.0  # longer Retry-After values are not waited out
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failed calls before failing fast
+    CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # Rows allowed in one /calculator/batch or /calculator/expression request
+    CALCULATOR_BATCH_MAX_ROWS: int = 100_000
+    # /calculator/expression: compiled expressions kept, and limits on what is compiled
+    CALCULATOR_EXPRESSION_CACHE_ENTRIES: int = 1024
+    CALCULATOR_EXPRESSION_MAX_LENGTH: int = 1000
+    CALCULATOR_EXPRESSION_MAX_NODES: int = 200
+
+    # Admission control for /llm: token buckets per client address and per known X-API-Key, and a
+    # global in-flight cap, with waiters served round-robin by client; 0 turns a limit off. Every limit
+    # is kept per worker process, so with N workers a client can get up to N times each of them
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_API_KEY_HEADER: str = "x-api-key"
+    ADMISSION_API_KEYS: str = ""  # comma-separated keys that identify clients; other keys are ignored
+    ADMISSION_LLM_REQUESTS_PER_SECOND: float = 2.0  # per worker process
+    ADMISSION_LLM_BURST: float = 20.0  # per worker process
+    ADMISSION_LLM_MAX_IN_FLIGHT: int = 32  # per worker process
+    ADMISSION_LLM_MAX_QUEUED: int = 128  # per worker process
+    ADMISSION_LLM_MAX_QUEUED_PER_CLIENT: int = 8
+    # GET job polls and /llm/*/stats reads: a separate, looser bucket and no in-flight cap
+    ADMISSION_LLM_READS_PER_SECOND: float = 10.0  # per worker process
+    ADMISSION_LLM_READS_BURST: float = 50.0  # per worker process
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0  # waiting longer for a slot is answered with 429
+    ADMISSION_MAX_CLIENTS: int = 10_000  # rate-limit buckets kept; the least recently seen are dropped
+
+    # Tavily search used while answering interview questions
+    SEARCH_MAX_RESULTS: int = 4
+    SEARCH_MAX_CONCURRENCY: int = 4  # concurrent queries within one interview turn, not across turns or runs
+    SEARCH_CACHE_TTL_SECONDS: Optional[float] = 60 * 60
+    SEARCH_CACHE_MAX_ENTRIES: int = 4096
+
+    # Wikipedia background research; set WIKIPEDIA_CACHE_PATH empty to disable the page cache
+    WIKIPEDIA_CACHE_PATH: Optional[str] = os.path.join(CACHE_DIRECTORY, "wikipedia.sqlite")
+    WIKIPEDIA_CACHE_TTL_SECONDS: Optional[float] = 7 * 24 * 60 * 60
+    WIKIPEDIA_CACHE_MAX_ENTRIES: Optional[int] = 100_000
+    WIKIPEDIA_MAX_CONCURRENCY: int = 8
+
+    # Token budgets for retrieved context sent to the models
+    ANSWER_CONTEXT_TOKENS: int = 4000  # search results per interview answer
+    SURVEY_CONTEXT_TOKENS: int = 3000  # Wikipedia examples for perspective generation
+
+    # Routed chains use the fast model unless the rendered prompt is over this many tokens; 0 always escalates
+    MODEL_ROUTING_TOKEN_THRESHOLD: int = 6000
+
+    # References retrieved per outline section before it is written
+    SECTION_REFERENCES_K: int = 5
+    SECTION_WRITER_MAX_CONCURRENCY: int = 8  # sections written at once per run
+    # Memory-mapped embedding cache (one subdirectory per model); set empty to disable
+    EMBEDDING_CACHE_DIRECTORY: Optional[str] = os.path.join(CACHE_DIRECTORY, "embeddings")
+
+    # Durable STORM checkpoints for resuming interrupted runs, e.g. "data/checkpoints.sqlite"; unset keeps them
+    # in memory, where a failed run's checkpoints are dropped and it cannot be resumed
+    STORM_CHECKPOINT_PATH: Optional[str] = None
+    STORM_CHECKPOINT_TTL_SECONDS: float = 7 * 24 * 60 * 60  # unfinished runs older than this are purged
+
+    # Interview scheduling: global concurrency, per-interview turns and per-run budgets
+    INTERVIEW_MAX_CONCURRENCY: int = 8  # interviews in flight across all runs
+    INTERVIEW_MAX_TURNS: int = 5
+    INTERVIEW_STALE_TURNS: int = 2  # answers in a row, per interview, citing nothing new to the run before stopping
+    STORM_RUN_MAX_INTERVIEW_TURNS: int = 30
+    STORM_RUN_MAX_INTERVIEW_TOKENS: int = 500_000
+    STORM_RUN_MAX_INTERVIEW_DOLLARS: float = 1.0
+
+    # Background STORM jobs; off unless STORM_JOBS_PATH names a writable SQLite file, e.g. "data/jobs.sqlite"
+    STORM_JOBS_PATH: Optional[str] = None
+    STORM_JOB_WORKERS: int = 2  # concurrent runs per process
+    STORM_JOB_MAX_QUEUED: int = 32  # submissions beyond this are rejected with 503
+    STORM_JOB_MAX_ATTEMPTS: int = 3
+    STORM_JOB_LEASE_SECONDS: float = 60.0  # a running job is reclaimed if its worker stops renewing
+    STORM_JOB_POLL_SECONDS: float = 1.0
+
+    # Intermediate STORM artifacts; ARTIFACT_STORE_PATH (e.g. "data/artifacts.sqlite") adds a tier shared by all
+    # workers on the host, otherwise each worker keeps them in memory only
+    ARTIFACT_MAX_ENTRIES: int = 1024
+    ARTIFACT_MAX_BYTES: int = 32 * 1024 * 1024
+    ARTIFACT_TTL_SECONDS: Optional[float] = 24 * 60 * 60
+    ARTIFACT_STORE_PATH: Optional[str] = None
+    ARTIFACT_STORE_MAX_ENTRIES: Optional[int] = 50_000
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 2048
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LLM_CACHE_TTL_SECONDS: Optional[float] = 24 * 60 * 60
+    LLM_CACHE_SQLITE_PATH: Optional[str] = None  # e.g. "data/llm_cache.sqlite" to persist across restarts
+    LLM_CACHE_SQLITE_MAX_ENTRIES: Optional[int] = 50_000
+    # Expired rows of the SQLite cache tiers are deleted on open and then at most this often, on write
+    SQLITE_CACHE_PURGE_INTERVAL_SECONDS: float = 60 * 60
+
+    # Production server (python main.py --production); SERVER_WORKERS 0 means one per CPU core
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8002
+    SERVER_WORKERS: int = 0
+    SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"  # auto uses uvloop when installed
+    SERVER_HTTP: Literal["auto", "h11", "httptools"] = "auto"  # auto uses httptools when installed
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None  # connections per worker before answering 503
+    SERVER_ACCESS_LOG: bool = False
+    # On shutdown: open requests and STORM streams get this long, then STORM jobs get STORM_JOB_DRAIN_SECONDS
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: float = 30.0
+    STORM_JOB_DRAIN_SECONDS: float = 30.0
+    SERVER_PRELOAD: bool = False  # build the STORM graph, chains and clients at startup instead of first use
 
     # Pydantic Configuration
     model_config = ConfigDict(
@@ -27,6 +164,14 @@ class Settings(BaseSettings):
         extra="ignore"  # Ignores any extra variables not defined in the Settings class
     )
 
+    @model_validator(mode="after")
+    def require_api_keys(self):
+        if self.BACKENDS == "live":
+            missing = [name for name in ("TAVILY_API_KEY", "OPENAI_API_KEY") if not getattr(self, name)]
+            if missing:
+                raise ValueError(f"{', '.join(missing)} must be set unless BACKENDS=fake")
+        return self
+
 
 @lru_cache()
 def get_config() -> Settings:
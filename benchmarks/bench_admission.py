@@ -0,0 +1,102 @@
+# benchmarks/bench_admission.py
+"""How one heavy tenant on /llm affects a light tenant and /calculator, with and without admission control.
+
+The downstream app stands in for the LLM pipelines. It has room for ``--capacity``
+concurrent /llm requests, each taking ``--service-ms``, and anything beyond that waits
+for room; /calculator answers at once. A heavy tenant keeps ``--heavy-users`` /llm
+requests in flight, while a light tenant and a calculator client each send one request
+at a time. The run is repeated behind :class:`AdmissionMiddleware`. Run from the
+repository root:
+
+    python -m benchmarks.bench_admission --heavy-users 64 --capacity 8 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+
+from app.middleware.admission import AdmissionController, AdmissionMiddleware, RouteClass  # noqa: E402
+from benchmarks.load_test import percentile  # noqa: E402
+
+
+def backend(capacity: int, service_seconds: float):
+    slots = asyncio.Semaphore(capacity)
+
+    async def app(scope, receive, send):
+        if scope["path"].startswith("/llm"):
+            async with slots:
+                await asyncio.sleep(service_seconds)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+async def run(app, args) -> Dict[str, Dict[str, List]]:
+    transport = httpx.ASGITransport(app=app)
+    results = {name: {"latencies": [], "rejected": 0} for name in ("heavy", "light", "calculator")}
+    deadline = time.monotonic() + args.seconds
+
+    async def user(name: str, path: str, api_key: str):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                     headers={"X-API-Key": api_key}) as client:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                response = await client.get(path)
+                if response.status_code == 429:
+                    results[name]["rejected"] += 1
+                    # Well-behaved clients back off for Retry-After; capped so the run stays short
+                    await asyncio.sleep(min(float(response.headers.get("retry-after", 1)), 0.05))
+                else:
+                    results[name]["latencies"].append(time.perf_counter() - start)
+                    # In-process requests that never wait would otherwise keep the event loop to themselves
+                    await asyncio.sleep(0)
+
+    await asyncio.gather(
+        *(user("heavy", "/llm/generate_outline", "heavy-tenant") for _ in range(args.heavy_users)),
+        user("light", "/llm/generate_outline", "light-tenant"),
+        user("calculator", "/calculator/add/1/2", "light-tenant"),
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--heavy-users", type=int, default=64)
+    parser.add_argument("--capacity", type=int, default=8, help="concurrent /llm requests the backend can serve")
+    parser.add_argument("--service-ms", type=float, default=50.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=0.0, help="per-client /llm requests per second; 0 is unlimited")
+    parser.add_argument("--queue-per-client", type=int, default=4)
+    args = parser.parse_args()
+
+    downstream = backend(args.capacity, args.service_ms / 1000)
+    llm = RouteClass("llm", "/llm", rate=args.rate, burst=max(args.rate, 1.0), max_in_flight=args.capacity,
+                     max_queued=4 * args.capacity + args.queue_per_client, max_queued_per_client=args.queue_per_client,
+                     queue_timeout=1.0)
+    setups = [
+        ("no admission control", downstream),
+        # Both tenants share the in-process client's address, so their keys have to be known ones
+        ("admission control", AdmissionMiddleware(downstream, AdmissionController(
+            [llm], api_keys=["heavy-tenant", "light-tenant"]))),
+    ]
+    for label, app in setups:
+        results = asyncio.run(run(app, args))
+        print(f"{label}:")
+        for name, result in results.items():
+            latencies = result["latencies"]
+            print(
+                f"  {name:>10}: {len(latencies) / args.seconds:8.1f} req/s, "
+                f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms, p95 {percentile(latencies, 0.95) * 1000:7.1f} ms, "
+                f"{result['rejected']} rejected with 429"
+            )
+
+
+if __name__ == "__main__":
+    main()
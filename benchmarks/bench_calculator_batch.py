@@ -0,0 +1,110 @@
+# benchmarks/bench_calculator_batch.py
+"""Throughput of POST /calculator/batch against the single-operation calculator routes.
+
+The same mixed workload is sent once through the per-call routes (one HTTP round trip
+per operation, ``--concurrency`` in flight) and once as batches, as JSON arrays and as
+NDJSON. Requests go through the ASGI app in process, so the numbers are framework and
+service cost without network time. Run from the repository root:
+
+    python -m benchmarks.bench_calculator_batch --operations 5000 --batch-size 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import List, Tuple
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+import orjson  # noqa: E402
+
+from app.app import app  # noqa: E402
+
+OPERATIONS = ("add", "subtract", "multiply", "divide")
+
+
+def workload(operations: int, seed: int = 11) -> List[Tuple[str, int, int]]:
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(operations):
+        second = rng.randint(1, 1000)
+        rows.append((rng.choice(OPERATIONS), rng.randint(second, 10 ** 6), second))
+    return rows
+
+
+async def single(client: httpx.AsyncClient, operation: str, first: int, second: int):
+    if operation == "add":
+        response = await client.get(f"/calculator/add/{first}/{second}")
+    elif operation == "subtract":
+        response = await client.get("/calculator/subtract", params={"firstNumber": first, "secondNumber": second})
+    elif operation == "divide":
+        response = await client.post("/calculator/divide", json={"firstNumber": first, "secondNumber": second})
+    else:
+        response = await client.post("/calculator/multiply", data={"first_number": first, "second_number": second})
+    response.raise_for_status()
+
+
+async def run_single(client: httpx.AsyncClient, rows, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(row):
+        async with semaphore:
+            await single(client, *row)
+
+    await asyncio.gather(*(one(row) for row in rows))
+
+
+async def run_batches(client: httpx.AsyncClient, rows, batch_size: int, ndjson: bool):
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        if ndjson:
+            body = b"\n".join(orjson.dumps({"operation": operation, "firstNumber": first, "secondNumber": second})
+                              for operation, first, second in chunk)
+            response = await client.post("/calculator/batch", content=body,
+                                         headers={"content-type": "application/x-ndjson"})
+        else:
+            operations, firsts, seconds = zip(*chunk)
+            response = await client.post("/calculator/batch", json={
+                "operations": operations, "firstNumbers": firsts, "secondNumbers": seconds})
+        response.raise_for_status()
+
+
+async def measure(args):
+    rows = workload(args.operations)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+    # Warm up routing, validation and the lazy NumPy import before timing anything
+    await run_single(client, rows[:50], args.concurrency)
+    await run_batches(client, rows[:50], 50, ndjson=False)
+
+    scenarios = [
+        ("per-call routes", lambda: run_single(client, rows, args.concurrency)),
+        (f"batch JSON x{args.batch_size}", lambda: run_batches(client, rows, args.batch_size, ndjson=False)),
+        (f"batch NDJSON x{args.batch_size}", lambda: run_batches(client, rows, args.batch_size, ndjson=True)),
+    ]
+    results = []
+    for label, scenario in scenarios:
+        start = time.perf_counter()
+        await scenario()
+        results.append((label, time.perf_counter() - start))
+    await client.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32, help="per-call requests in flight")
+    args = parser.parse_args()
+
+    results = asyncio.run(measure(args))
+    baseline = results[0][1]
+    for label, elapsed in results:
+        print(f"{label:>24}: {args.operations / elapsed:10.0f} ops/s ({elapsed:.3f} s, {baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
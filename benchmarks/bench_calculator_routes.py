@@ -0,0 +1,109 @@
+# benchmarks/bench_calculator_routes.py
+"""Requests per second for each /calculator route, driven straight through the ASGI app.
+
+Requests are fed to the app without an HTTP client or server, so the numbers are the
+cost of routing, validation, the service and response rendering. Results can be saved
+and compared against a later run, e.g. before and after a change:
+
+    python -m benchmarks.bench_calculator_routes --save /tmp/before.json
+    python -m benchmarks.bench_calculator_routes --compare /tmp/before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from app.app import app  # noqa: E402
+
+BATCH_ROWS = 100
+# name: (method, path, query string, content type, body)
+ROUTES: Dict[str, Tuple[str, str, str, str, bytes]] = {
+    "GET /calculator/": ("GET", "/calculator/", "", "", b""),
+    "GET /calculator/add": ("GET", "/calculator/add/1234/5678", "", "", b""),
+    "GET /calculator/subtract": ("GET", "/calculator/subtract", "firstNumber=1234&secondNumber=5678", "", b""),
+    "POST /calculator/divide": ("POST", "/calculator/divide", "", "application/json",
+                                b'{"firstNumber": 5678, "secondNumber": 12}'),
+    "POST /calculator/multiply": ("POST", "/calculator/multiply", "", "application/x-www-form-urlencoded",
+                                  urlencode({"first_number": 1234, "second_number": 5678}).encode()),
+    f"POST /calculator/batch x{BATCH_ROWS}": ("POST", "/calculator/batch", "", "application/json", json.dumps({
+        "operations": ["add", "subtract", "multiply", "divide"] * (BATCH_ROWS // 4),
+        "firstNumbers": list(range(1000, 1000 + BATCH_ROWS)),
+        "secondNumbers": list(range(1, 1 + BATCH_ROWS)),
+    }).encode()),
+    f"POST /calculator/expression x{BATCH_ROWS}": ("POST", "/calculator/expression", "", "application/json",
+                                                   json.dumps({"expression": "(a + b) * c / d", "variables": {
+                                                       name: [float(index + 1) for index in range(BATCH_ROWS)]
+                                                       for name in "abcd"}}).encode()),
+}
+
+
+async def call(method: str, path: str, query: str, content_type: str, body: bytes) -> int:
+    headers = [(b"host", b"benchmark")]
+    if content_type:
+        headers += [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": headers, "client": ("127.0.0.1", 50000), "server": ("benchmark", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(requests: int, repeats: int) -> Dict[str, float]:
+    results = {}
+    for name, route in ROUTES.items():
+        status = await call(*route)
+        if status != 200:
+            raise RuntimeError(f"{name} answered {status}")
+        timings: List[float] = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(requests):
+                await call(*route)
+            timings.append(time.perf_counter() - start)
+        results[name] = requests / min(timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per route per repeat")
+    parser.add_argument("--repeats", type=int, default=3, help="the best repeat is reported")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier --save to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(measure(args.requests, args.repeats))
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    for name, rate in results.items():
+        line = f"{name:>32}: {rate:10.0f} req/s"
+        if name in baseline:
+            line += f"  (was {baseline[name]:10.0f}, {rate / baseline[name]:5.2f}x)"
+        print(line)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_expression.py
+"""Cost of /calculator/expression split into compiling and evaluating, as rows grow.
+
+For each row count the same formula is evaluated with a cold plan cache (parse, compile
+and evaluate) and a warm one (evaluate only), through the service and through the ASGI
+app. Run from the repository root:
+
+    python -m benchmarks.bench_expression --rows 1,100,10000,100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+
+from app.app import app  # noqa: E402
+from app.service.expression import get_expression_cache  # noqa: E402
+from app.service.impl.calculator_service_impl import CalculatorServiceImpl  # noqa: E402
+
+EXPRESSION = "(a + b) * c / d - max(a, 2 * b) % 7 + sqrt(abs(c - d))"
+
+
+def bindings(rows: int, seed: int = 5):
+    rng = random.Random(seed)
+    return {name: [rng.uniform(-100, 100) for _ in range(rows)] for name in "abcd"}
+
+
+def best_of(repeats: int, function) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def over_http(client: httpx.AsyncClient, variables, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = await client.post("/calculator/expression", json={"expression": EXPRESSION, "variables": variables})
+        response.raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="1,100,10000,100000", help="comma-separated row counts")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    service = CalculatorServiceImpl()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+    service.evaluate_expression(EXPRESSION, bindings(1))  # load NumPy before timing
+    print(f"expression: {EXPRESSION}")
+    for rows in (int(value) for value in args.rows.split(",")):
+        variables = bindings(rows)
+
+        def cold():
+            get_expression_cache().clear()
+            service.evaluate_expression(EXPRESSION, variables)
+
+        cold_seconds = best_of(args.repeats, cold)
+        warm_seconds = best_of(args.repeats, lambda: service.evaluate_expression(EXPRESSION, variables))
+        http_seconds = asyncio.run(over_http(client, variables, args.repeats))
+        print(
+            f"{rows:>8} rows: service cold {cold_seconds * 1000:8.3f} ms, warm {warm_seconds * 1000:8.3f} ms "
+            f"({warm_seconds / rows * 1e9:8.1f} ns/row), HTTP warm {http_seconds * 1000:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_interviews.py
+"""Answer turns, tokens and cited-URL coverage of STORM interviews for each INTERVIEW_STALE_TURNS value.
+
+Each topic's outline and editors are generated once with the fake backends, then the
+same interviews are run under each staleness setting. Coverage is the share of the URLs
+cited with early stopping off (every interview runs INTERVIEW_MAX_TURNS answers) that
+are still cited. Run from the repository root:
+
+    python -m benchmarks.bench_interviews --topics 10 --stale-turns 1,2,3
+"""
+import argparse
+import asyncio
+import os
+from typing import Any, Dict, List, Set, Tuple
+
+os.environ.setdefault("BACKENDS", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "1")
+# Each setting pays for its own calls instead of replaying the previous one's
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+from langchain_core.messages import AIMessage  # noqa: E402
+
+from app.service.usage import UsageTracker  # noqa: E402
+from app.service.workflow import conduct_interviews, initialize_research  # noqa: E402
+from app.setting import get_config  # noqa: E402
+
+
+async def interview(state: Dict[str, Any], stale_turns: int) -> Tuple[int, Set[str], int]:
+    """Answer turns, cited URLs and tokens of one run's interviews."""
+    get_config().INTERVIEW_STALE_TURNS = stale_turns
+    usage = UsageTracker()
+    result = await conduct_interviews(state, {"callbacks": [usage]})
+    turns, urls = 0, set()
+    for interview_state in result["interview_results"]:
+        turns += sum(1 for message in interview_state["messages"]
+                     if isinstance(message, AIMessage) and message.name == "Subject_Matter_Expert")
+        urls |= set(interview_state.get("references") or {})
+    # The opening line of every interview is scripted, not an answer
+    return turns - len(result["interview_results"]), urls, usage.total_tokens
+
+
+async def measure(topics: int, settings: List[int]) -> Dict[int, Dict[str, float]]:
+    states = [await initialize_research({"topic": f"benchmark topic {index}"}) for index in range(topics)]
+    baseline_turns = get_config().INTERVIEW_MAX_TURNS + 1
+    results = {}
+    baseline: List[Set[str]] = []
+    for stale_turns in [baseline_turns, *settings]:
+        turns = tokens = 0
+        covered = cited = 0
+        for index, state in enumerate(states):
+            state_turns, urls, state_tokens = await interview(state, stale_turns)
+            turns += state_turns
+            tokens += state_tokens
+            if stale_turns == baseline_turns:
+                baseline.append(urls)
+            covered += len(urls & baseline[index])
+            cited += len(baseline[index])
+        results[stale_turns] = {"turns": turns / topics, "tokens": tokens / topics, "coverage": covered / max(cited, 1)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", type=int, default=10)
+    parser.add_argument("--stale-turns", default="1,2,3", help="comma-separated INTERVIEW_STALE_TURNS values")
+    args = parser.parse_args()
+
+    settings = [int(value) for value in args.stale_turns.split(",")]
+    results = asyncio.run(measure(args.topics, settings))
+    for stale_turns, result in results.items():
+        label = "off" if stale_turns > get_config().INTERVIEW_MAX_TURNS else str(stale_turns)
+        print(
+            f"stale turns {label:>3}: {result['turns']:5.1f} answers/run, {result['tokens']:8.0f} tokens/run, "
+            f"{result['coverage']:6.1%} of cited URLs"
+        )
+
+
+if __name__ == "__main__":
+    main()
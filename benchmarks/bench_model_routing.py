@@ -0,0 +1,115 @@
+# benchmarks/bench_model_routing.py
+"""Latency and cost of model routing policies over a fixed corpus of section-writer prompts.
+
+Models are simulated from published latency profiles (time to first token, prefill and
+decode throughput) and priced with ``app.service.usage``. Run from the repository root:
+
+    python -m benchmarks.bench_model_routing --prompts 200 --thresholds 2000,6000,12000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Any, List, Optional
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, BaseMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
+
+from app.service.context_packer import count_tokens  # noqa: E402
+from app.service.model_router import ModelRouter  # noqa: E402
+from app.service.usage import UsageTracker  # noqa: E402
+
+# Seconds to first token, then input and output tokens per second
+LATENCY_PROFILES = {
+    "gpt-4o-mini": (0.35, 40_000.0, 130.0),
+    "gpt-4o": (0.45, 20_000.0, 90.0),
+}
+WORDS = ("the", "model", "section", "history", "research", "article", "source", "result", "topic",
+         "analysis", "citation", "evidence", "network", "language", "system", "design", "study")
+
+
+class SimulatedChatModel(BaseChatModel):
+    """Chat model that sleeps for its latency profile and reports token usage."""
+
+    model_name: str
+    output_tokens: int = 600
+    time_scale: float = 1.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError("use the async API")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any
+                         ) -> ChatResult:
+        input_tokens = sum(count_tokens(str(message.content), self.model_name) for message in messages)
+        first_token, prefill, decode = LATENCY_PROFILES[self.model_name]
+        seconds = first_token + input_tokens / prefill + self.output_tokens / decode
+        await asyncio.sleep(seconds * self.time_scale)
+        message = AIMessage(
+            content="",
+            response_metadata={"model_name": self.model_name, "simulated_seconds": seconds,
+                               "slept_seconds": seconds * self.time_scale},
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": self.output_tokens,
+                            "total_tokens": input_tokens + self.output_tokens},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def prompt_corpus(prompts: int, seed: int = 7) -> List[str]:
+    # Reference context per section is long-tailed: most sections get a few short snippets
+    rng = random.Random(seed)
+    sizes = [min(int(rng.lognormvariate(8.0, 0.8)), 30_000) for _ in range(prompts)]
+    return [" ".join(rng.choice(WORDS) for _ in range(size)) for size in sizes]
+
+
+async def run_policy(threshold: int, corpus: List[str], time_scale: float, concurrency: int):
+    fast, long = (SimulatedChatModel(model_name=name, time_scale=time_scale) for name in ("gpt-4o-mini", "gpt-4o"))
+    router = ModelRouter("section_writer", fast, long, "gpt-4o-mini", "gpt-4o", threshold).as_runnable()
+    chain = ChatPromptTemplate.from_template("Write the section using these references:\n{docs}") | router
+    usage = UsageTracker()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(docs: str):
+        async with semaphore:
+            start = time.perf_counter()
+            message = await chain.ainvoke({"docs": docs}, {"callbacks": [usage]})
+            # Simulated model time plus the measured overhead of rendering and routing the prompt
+            overhead = time.perf_counter() - start - message.response_metadata["slept_seconds"]
+            latencies.append(message.response_metadata["simulated_seconds"] + overhead)
+
+    await asyncio.gather(*(one(docs) for docs in corpus))
+    return sorted(latencies), usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=200)
+    parser.add_argument("--thresholds", default="2000,6000,12000", help="comma-separated token thresholds")
+    parser.add_argument("--time-scale", type=float, default=0.001, help="fraction of simulated latency to sleep")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    corpus = prompt_corpus(args.prompts)
+    policies = [("always gpt-4o", 0), ("always gpt-4o-mini", 10 ** 9)]
+    policies += [(f"tiered @ {threshold}", int(threshold)) for threshold in args.thresholds.split(",")]
+    for label, threshold in policies:
+        latencies, usage = asyncio.run(run_policy(threshold, corpus, args.time_scale, args.concurrency))
+        p50, p95 = latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"{label:>20}: p50 {p50:6.2f} s, p95 {p95:6.2f} s, "
+            f"${usage.cost:8.4f} for {args.prompts} prompts ({usage.input_tokens} input tokens)"
+        )
+
+
+if __name__ == "__main__":
+    main()
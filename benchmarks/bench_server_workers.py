@@ -0,0 +1,134 @@
+# benchmarks/bench_server_workers.py
+"""Throughput of the production server (``python main.py --production``) as workers are added.
+
+For each worker count a server is started on a local port with the fake backends, loaded
+by concurrent keep-alive clients for a fixed time, then stopped with SIGTERM so its
+graceful shutdown is exercised as well. The load generator runs on the same machine, so
+leave it some cores. Run from the repository root:
+
+    python -m benchmarks.bench_server_workers --workers 1,2,4 --route /calculator/add/1/2
+    python -m benchmarks.bench_server_workers --workers 1,4 --route "/llm/generate_outline?topic=x" --method POST
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from benchmarks.load_test import percentile
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, directory: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "BACKENDS": "fake",
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": str(workers),
+        "FAKE_LLM_LATENCY_MS": env.get("FAKE_LLM_LATENCY_MS", "50"),
+        "STORM_JOBS_PATH": os.path.join(directory, "jobs.sqlite"),
+        "STORM_CHECKPOINT_PATH": os.path.join(directory, "checkpoints.sqlite"),
+        "ARTIFACT_STORE_PATH": os.path.join(directory, "artifacts.sqlite"),
+        "WIKIPEDIA_CACHE_PATH": os.path.join(directory, "wikipedia.sqlite"),
+        # The clients all connect from 127.0.0.1, so admission control would rate limit the /llm runs
+        "ADMISSION_CONTROL_ENABLED": "false",
+    })
+    return subprocess.Popen([sys.executable, "main.py", "--production"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_until_up(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not come up in {timeout:.0f} s")
+
+
+async def load(base_url: str, method: str, route: str, users: int, seconds: float):
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.monotonic() + seconds
+
+        async def user():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, route)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(users)))
+        return latencies, errors, time.perf_counter() - start
+
+
+def load_process(base_url: str, method: str, route: str, users: int, seconds: float):
+    return asyncio.run(load(base_url, method, route, users, seconds))
+
+
+def load_from_processes(processes: int, base_url: str, method: str, route: str, users: int, seconds: float):
+    # One httpx pool slows down past a few dozen connections, so the clients are spread over processes
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [pool.submit(load_process, base_url, method, route, max(1, users // processes), seconds)
+                   for _ in range(processes)]
+        results = [future.result() for future in futures]
+    latencies = [latency for result in results for latency in result[0]]
+    return latencies, sum(result[1] for result in results), max(result[2] for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--route", default="/calculator/add/1/2")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--users", type=int, default=32, help="concurrent keep-alive clients")
+    parser.add_argument("--client-processes", type=int, default=4, help="processes the clients are spread over")
+    parser.add_argument("--seconds", type=float, default=10.0, help="load duration per worker count")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores; {args.users} clients on {args.method} {args.route} for {args.seconds:.0f} s")
+    for workers in (int(value) for value in args.workers.split(",")):
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        with tempfile.TemporaryDirectory() as directory:
+            server = start_server(workers, port, directory)
+            try:
+                asyncio.run(wait_until_up(base_url))
+                latencies, errors, elapsed = load_from_processes(
+                    args.client_processes, base_url, args.method, args.route, args.users, args.seconds)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                stopping = time.perf_counter()
+                server.wait(timeout=120)
+                shutdown = time.perf_counter() - stopping
+        print(
+            f"{workers:>3} workers: {len(latencies) / elapsed:9.0f} req/s, p50 {percentile(latencies, 0.5) * 1000:7.1f} ms, "
+            f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms, {errors} errors, shutdown {shutdown:.1f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# benchmarks/bench_storm_graph.py
+"""Per-request STORM graph setup cost: compiling per run vs. the shared compiled graph.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_storm_graph --topics 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from app.service.workflow import build_storm_graph, get_storm_graph, new_storm_config  # noqa: E402
+
+
+async def submit(acquire_graph, topic: str):
+    storm = acquire_graph()
+    config = new_storm_config()
+    # Touch the checkpointer the same way a run does before its first step
+    await storm.aget_state(config)
+    return topic
+
+
+async def measure(acquire_graph, topics: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(submit(acquire_graph, f"topic {i}") for i in range(topics)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", type=int, default=100, help="concurrent topics submitted per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    get_storm_graph()  # the shared graph is compiled once at first use, not per request
+    for label, acquire_graph in (("compile per run", build_storm_graph), ("shared graph", get_storm_graph)):
+        best = min(asyncio.run(measure(acquire_graph, args.topics)) for _ in range(args.rounds))
+        print(
+            f"{label:>16}: {best * 1000:9.1f} ms for {args.topics} topics "
+            f"({best * 1000 / args.topics:7.3f} ms/request)"
+        )
+
+
+if __name__ == "__main__":
+    main()
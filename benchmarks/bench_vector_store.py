@@ -0,0 +1,86 @@
+# benchmarks/bench_vector_store.py
+"""Reference indexing and per-section retrieval: InMemoryVectorStore vs. NumpyVectorStore.
+
+Embeddings are deterministic fakes with a fixed per-call latency, so the numbers show
+store overhead plus the embedding calls each approach makes. Run from the repository root:
+
+    python -m benchmarks.bench_vector_store --references 2000 --sections 12
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from langchain_community.vectorstores import InMemoryVectorStore  # noqa: E402
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+
+from app.service.vector_store import CachedEmbeddings, EmbeddingCache, NumpyVectorStore  # noqa: E402
+
+
+class SlowFakeEmbedding(DeterministicFakeEmbedding):
+    latency_seconds: float = 0.05
+    calls: int = 0
+    texts: int = 0
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        await asyncio.sleep(self.latency_seconds)
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+
+async def in_memory_run(embedding, references, titles, k):
+    store = InMemoryVectorStore(embedding=embedding)
+    await store.aadd_texts(references)
+    return await asyncio.gather(*(store.asimilarity_search(title, k=k) for title in titles))
+
+
+async def numpy_run(embedding, references, titles, k):
+    store = NumpyVectorStore(embedding)
+    await store.aadd_texts(references)
+    # One call per section, as write_section makes them; the store coalesces them into one batch
+    return await asyncio.gather(*(store.asimilarity_search(title, k=k) for title in titles))
+
+
+def measure(label, run, embedding, references, titles, k):
+    start = time.perf_counter()
+    asyncio.run(run(embedding, references, titles, k))
+    elapsed = time.perf_counter() - start
+    inner = getattr(embedding, "embeddings", embedding)
+    print(f"{label:>22}: {elapsed * 1000:9.1f} ms  embedding calls={inner.calls:3d} texts={inner.texts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--references", type=int, default=2000)
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake embedding call")
+    args = parser.parse_args()
+
+    references = [f"reference {i} about topic {i % 97}" for i in range(args.references)]
+    titles = [f"section {i}" for i in range(args.sections)]
+
+    def fake():
+        return SlowFakeEmbedding(size=args.dimensions, latency_seconds=args.latency)
+
+    measure("InMemoryVectorStore", in_memory_run, fake(), references, titles, args.k)
+    measure("NumpyVectorStore", numpy_run, fake(), references, titles, args.k)
+    with tempfile.TemporaryDirectory() as directory:
+        measure("cached, cold", numpy_run,
+                CachedEmbeddings(fake(), EmbeddingCache(directory), "fake"), references, titles, args.k)
+        # A fresh cache object over the same files stands in for a restarted worker
+        measure("cached, warm restart", numpy_run,
+                CachedEmbeddings(fake(), EmbeddingCache(directory), "fake"), references, titles, args.k)
+
+
+if __name__ == "__main__":
+    main()
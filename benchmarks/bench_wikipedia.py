@@ -0,0 +1,68 @@
+# benchmarks/bench_wikipedia.py
+"""Wikipedia survey retrieval against the offline fixture corpus: no cache vs. cold vs. warm page cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_wikipedia --surveys 50 --latency-ms 150
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+
+from app.service.cache import SQLiteCache  # noqa: E402
+from app.service.clients import UPSTREAMS, set_http_client  # noqa: E402
+from app.service.wiki_retriever import WikipediaPageRetriever  # noqa: E402
+from benchmarks.wikipedia_fixture import corpus_transport, load_corpus  # noqa: E402
+
+
+def survey_topics(corpus, surveys: int, topics_per_survey: int, seed: int = 7):
+    # Related-subject lists from different surveys overlap heavily, like popular topics do
+    rng = random.Random(seed)
+    titles = [page["title"] for page in corpus]
+    return [rng.sample(titles, topics_per_survey) for _ in range(surveys)]
+
+
+async def run(retriever: WikipediaPageRetriever, surveys) -> float:
+    start = time.perf_counter()
+    for topics in surveys:
+        await retriever.abatch(topics, return_exceptions=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--surveys", type=int, default=50)
+    parser.add_argument("--topics-per-survey", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="simulated MediaWiki latency")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    surveys = survey_topics(corpus, args.surveys, args.topics_per_survey)
+    transport = corpus_transport(corpus, args.latency_ms / 1000)
+    set_http_client("wikipedia", httpx.AsyncClient(base_url=UPSTREAMS["wikipedia"], transport=transport))
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SQLiteCache(os.path.join(directory, "wikipedia.sqlite"), table="wikipedia_pages")
+        for label, retriever in (
+            ("no cache", WikipediaPageRetriever(None)),
+            ("cold cache", WikipediaPageRetriever(cache)),
+            ("warm cache", WikipediaPageRetriever(cache)),
+        ):
+            requests_before = transport.handler.requests
+            elapsed = asyncio.run(run(retriever, surveys))
+            print(
+                f"{label:>10}: {elapsed * 1000:9.1f} ms for {args.surveys} surveys, "
+                f"{transport.handler.requests - requests_before:5d} upstream requests"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/cold_start.py
+"""Cold-start budget for the lightweight routes.
+
+Each sample is a fresh interpreter that imports ``app.app`` and serves its first
+/health/ and /calculator/ requests. The check fails (non-zero exit) if the median import
+plus first-request time is over budget, or if importing the app pulled in any of the
+heavy LLM and retrieval libraries, which should only load once an LLM route is used.
+Run from the repository root:
+
+    python -m benchmarks.cold_start --samples 5 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("langchain_core", "langchain_openai", "langgraph", "openai", "numpy", "tiktoken")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app.app import app
+imported = time.perf_counter()
+loaded = sorted(name for name in {heavy!r} if name in sys.modules)
+from fastapi.testclient import TestClient
+client = TestClient(app)
+ready = time.perf_counter()
+for path in ("/health/", "/calculator/"):
+    client.get(path).raise_for_status()
+served = time.perf_counter()
+print(json.dumps({{"import": imported - start, "first_request": served - ready, "heavy": loaded}}))
+"""
+
+
+def sample() -> dict:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env.setdefault("TAVILY_API_KEY", "benchmark")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_profile():
+    # Self time per module from -X importtime, for the slowest imports in one cold start
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env.setdefault("TAVILY_API_KEY", "benchmark")
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.app"],
+        env=env, check=True, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0,
+                        help="median import plus first-request time allowed")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.samples)]
+    imports = [result["import"] * 1000 for result in samples]
+    totals = [(result["import"] + result["first_request"]) * 1000 for result in samples]
+    print(f"import app.app: median {statistics.median(imports):.0f} ms, max {max(imports):.0f} ms")
+    print(f"import + first request: median {statistics.median(totals):.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    print("slowest imports (cumulative):")
+    for cumulative, name in import_profile()[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    heavy = sorted({name for result in samples for name in result["heavy"]})
+    if heavy:
+        failures.append(f"importing the app loaded {', '.join(heavy)}")
+    if statistics.median(totals) > args.budget_ms:
+        failures.append(f"cold start {statistics.median(totals):.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/fault_injection.py
+"""Tavily searches against a fake upstream that injects 429s, 503s, timeouts and an outage.
+
+Compares calls without retries to the pooled clients' call-level retries (backoff,
+Retry-After, circuit breaker). Run from the repository root:
+
+    python -m benchmarks.fault_injection --queries 200 --throttle-rate 0.1 --timeout-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+
+from app.service.clients import UPSTREAMS, InstrumentedTransport, set_http_client  # noqa: E402
+from app.service.resilience import BackoffPolicy, CircuitBreaker  # noqa: E402
+from app.service.search import TavilySearch  # noqa: E402
+
+
+class FaultyUpstream:
+    """``httpx.MockTransport`` handler answering like Tavily, with seeded fault injection.
+
+    While ``outage`` is set every request gets a 503.
+    """
+
+    def __init__(self, latency: float, throttle_rate: float, error_rate: float, timeout_rate: float,
+                 retry_after: float, seed: int = 7):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.retry_after = retry_after
+        self.outage = False
+        self.requests = 0
+        self.faults = {"429": 0, "503": 0, "timeout": 0}
+        self._rng = random.Random(seed)
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        roll = self._rng.random()
+        if self.outage or roll < self.error_rate:
+            self.faults["503"] += 1
+            return httpx.Response(503, json={"detail": "unavailable"})
+        roll -= self.error_rate
+        if roll < self.throttle_rate:
+            self.faults["429"] += 1
+            return httpx.Response(429, headers={"Retry-After": str(self.retry_after)}, json={"detail": "slow down"})
+        roll -= self.throttle_rate
+        if roll < self.timeout_rate:
+            self.faults["timeout"] += 1
+            raise httpx.ReadTimeout("injected timeout", request=request)
+        query = json.loads(request.content)["query"]
+        return httpx.Response(200, json={"results": [{"url": f"https://example.com/{query}", "content": query}]})
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def run(upstream: FaultyUpstream, transport: InstrumentedTransport, queries, outage_after: int):
+    set_http_client("tavily", httpx.AsyncClient(base_url=UPSTREAMS["tavily"], transport=transport))
+    search = TavilySearch(api_key="benchmark", max_concurrency=16)
+    latencies = []
+
+    async def one(index: int, query: str):
+        if outage_after and index == outage_after:
+            upstream.outage = True
+        start = time.perf_counter()
+        try:
+            await search.search(query)
+            return True
+        except httpx.HTTPError:
+            return False
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    semaphore = asyncio.Semaphore(16)
+
+    async def bounded(index: int, query: str):
+        async with semaphore:
+            return await one(index, query)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(bounded(index, query) for index, query in enumerate(queries)))
+    return results, latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated Tavily latency")
+    parser.add_argument("--throttle-rate", type=float, default=0.1, help="fraction of 429 responses")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of 503 responses")
+    parser.add_argument("--timeout-rate", type=float, default=0.05, help="fraction of timed out requests")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--outage-after", type=int, default=0,
+                        help="answer every request after the Nth query with 503 (0: no outage)")
+    args = parser.parse_args()
+
+    queries = [f"query {index}" for index in range(args.queries)]
+    for label, backoff in (
+        ("no retries", BackoffPolicy(max_attempts=1)),
+        ("call retries", BackoffPolicy(max_attempts=4, base_delay=0.05, max_delay=5.0)),
+    ):
+        upstream = FaultyUpstream(args.latency_ms / 1000, args.throttle_rate, args.error_rate,
+                                  args.timeout_rate, args.retry_after)
+        breaker = CircuitBreaker(failure_threshold=5, reset_seconds=1.0)
+        transport = InstrumentedTransport("tavily", transport=httpx.MockTransport(upstream),
+                                          backoff=backoff, breaker=breaker)
+        results, latencies, elapsed = asyncio.run(run(upstream, transport, queries, args.outage_after))
+        stats = transport.stats()
+        print(
+            f"{label:>12}: {sum(results) / len(results):6.1%} succeeded in {elapsed * 1000:8.1f} ms, "
+            f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms, p95 {percentile(latencies, 0.95) * 1000:7.1f} ms, "
+            f"mean {statistics.fmean(latencies) * 1000:7.1f} ms | "
+            f"{upstream.requests} upstream requests, {stats['retries']} retries, faults {upstream.faults}, "
+            f"breaker opened {breaker.opened}x, {stats['rejected']} rejected"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/load_test.py
+"""Load test of /llm/generate_outline and full run_storm against the fake backends.
+
+N concurrent users each issue requests back to back until the total is reached; the
+report gives throughput and p50/p95/p99 latency. Everything runs in process and offline
+(BACKENDS=fake), with the simulated upstream latencies taken from the FAKE_* settings.
+Run from the repository root:
+
+    python -m benchmarks.load_test --scenario outline --users 50 --requests 1000
+    python -m benchmarks.load_test --scenario storm --users 8 --requests 32 --llm-latency-ms 300
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable, List
+
+SCENARIOS = ("outline", "storm")
+
+
+def configure_environment(args, directory: str):
+    # Settings are read once, so everything has to be in the environment before app imports
+    os.environ["BACKENDS"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_SEARCH_LATENCY_MS"] = str(args.search_latency_ms)
+    os.environ["FAKE_WIKIPEDIA_LATENCY_MS"] = str(args.search_latency_ms)
+    os.environ["FAKE_LATENCY_DISTRIBUTION"] = args.distribution
+    os.environ["WIKIPEDIA_CACHE_PATH"] = os.path.join(directory, "wikipedia.sqlite")
+    os.environ["STORM_CHECKPOINT_PATH"] = os.path.join(directory, "checkpoints.sqlite")
+    os.environ["STORM_JOBS_PATH"] = os.path.join(directory, "jobs.sqlite")
+    os.environ["ARTIFACT_STORE_PATH"] = os.path.join(directory, "artifacts.sqlite")
+    # Every simulated user comes from the one in-process address, which admission control would rate limit
+    os.environ["ADMISSION_CONTROL_ENABLED"] = "false"
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def drive(request: Callable[[int], Awaitable[None]], users: int, requests: int):
+    latencies: List[float] = []
+    errors: List[BaseException] = []
+    counter = iter(range(requests))
+
+    async def user():
+        for index in counter:
+            start = time.perf_counter()
+            try:
+                await request(index)
+                latencies.append(time.perf_counter() - start)
+            except Exception as exception:
+                errors.append(exception)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_scenario(args):
+    import httpx
+
+    from app.app import app
+    from app.service.workflow import run_storm
+
+    topics = [f"load test topic {index % args.distinct_topics}" for index in range(args.requests)]
+    if args.scenario == "outline":
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test")
+
+        async def request(index: int):
+            response = await client.post("/llm/generate_outline", params={"topic": topics[index]})
+            response.raise_for_status()
+    else:
+        async def request(index: int):
+            await run_storm(topics[index])
+
+    return await drive(request, args.users, args.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=SCENARIOS, default="outline")
+    parser.add_argument("--users", type=int, default=20, help="concurrent users")
+    parser.add_argument("--requests", type=int, default=200, help="total requests across all users")
+    parser.add_argument("--distinct-topics", type=int, default=10 ** 9,
+                        help="topics cycle after this many requests, to exercise the caches")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--search-latency-ms", type=float, default=300.0)
+    parser.add_argument("--distribution", default="lognormal",
+                        choices=("constant", "uniform", "exponential", "lognormal"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure_environment(args, directory)
+        latencies, errors, elapsed = asyncio.run(run_scenario(args))
+
+    print(
+        f"{args.scenario}: {args.requests} requests from {args.users} users in {elapsed:.2f} s "
+        f"({len(latencies) / elapsed:.2f} req/s), {len(errors)} errors"
+    )
+    if latencies:
+        print(
+            f"latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+            f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, mean {statistics.fmean(latencies) * 1000:.1f} ms"
+        )
+    if errors:
+        print(f"first error: {errors[0]!r}")
+
+
+if __name__ == "__main__":
+    main()
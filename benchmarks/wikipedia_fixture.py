@@ -0,0 +1,43 @@
+# benchmarks/wikipedia_fixture.py
+"""Offline stand-in for the MediaWiki API, serving pages from a local fixture corpus."""
+import asyncio
+import json
+import os
+from typing import Any, Dict, List
+
+import httpx
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "wikipedia_corpus.json")
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Dict[str, Any]]:
+    with open(path) as corpus_file:
+        return json.load(corpus_file)
+
+
+def best_match(corpus: List[Dict[str, Any]], query: str):
+    words = set(query.casefold().split())
+    scored = [(len(words & set(page["title"].casefold().split())), page) for page in corpus]
+    score, page = max(scored, key=lambda item: item[0])
+    return page if score else None
+
+
+def corpus_transport(corpus: List[Dict[str, Any]], latency_seconds: float = 0.0) -> httpx.MockTransport:
+    """Answer ``generator=search`` queries the way ``WikipediaPageRetriever`` issues them."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        handler.requests += 1
+        if latency_seconds:
+            await asyncio.sleep(latency_seconds)
+        page = best_match(corpus, request.url.params.get("gsrsearch", ""))
+        if page is None:
+            return httpx.Response(200, json={"batchcomplete": True})
+        return httpx.Response(200, json={"query": {"pages": [{
+            "title": page["title"],
+            "extract": page["extract"],
+            "categories": [{"title": f"Category:{category}"} for category in page["categories"]],
+            "fullurl": f"https://en.wikipedia.org/wiki/{page['title'].replace(' ', '_')}",
+        }]}})
+
+    handler.requests = 0
+    return httpx.MockTransport(handler)
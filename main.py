@@ -1,11 +1,43 @@
-from dotenv import load_dotenv
+import argparse
 import os
+
 import uvicorn
+from dotenv import load_dotenv
 
 load_dotenv()
 
 
 HOST = '0.0.0.0'
 
+
+def production_options() -> dict:
+    # Imported after load_dotenv so .env values reach the settings
+    from app.setting import get_config
+
+    settings = get_config()
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "workers": settings.SERVER_WORKERS or os.cpu_count() or 1,
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE_SECONDS,
+        "backlog": settings.SERVER_BACKLOG,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        "access_log": settings.SERVER_ACCESS_LOG,
+        "proxy_headers": True,
+    }
+
+
 if __name__ == '__main__':
-    uvicorn.run('app.app:app', host = HOST, port = 8002, reload = True)
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--production", action="store_true",
+                        help="run several workers without the reloader, tuned from the SERVER_* settings")
+    args = parser.parse_args()
+    if args.production:
+        # Workers are separate processes that read their settings from the environment
+        os.environ.setdefault("SERVER_PRELOAD", "true")
+        uvicorn.run('app.app:app', **production_options())
+    else:
+        uvicorn.run('app.app:app', host = HOST, port = 8002, reload = True)